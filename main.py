@@ -456,6 +456,10 @@ async def _cleanup_processor(processor):
     # 并行清理所有会话
     if cleanup_tasks:
         await asyncio.gather(*cleanup_tasks, return_exceptions=True)
+    
+    # 关闭视频生成器持有的TOS上传线程池
+    if processor._video_generator is not None:
+        processor._video_generator.close()
 
 
 def create_sample_config():
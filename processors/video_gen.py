@@ -71,7 +71,7 @@ class VideoGenerator(LoggerMixin):
         
         # TOS客户端（用于图片上传）
         try:
-            self.tos_client = TOSClient(config)
+            self.tos_client = TOSClient.from_config(config)
             self.logger.info("TOS客户端初始化成功，将使用云存储上传图片")
         except Exception as e:
             self.logger.warning(f"TOS客户端初始化失败: {e}，图生视频功能将被禁用")
@@ -80,6 +80,12 @@ class VideoGenerator(LoggerMixin):
         # 提示词模板
         self.video_prompt_template = self._load_video_prompt_template()
     
+    def close(self):
+        """释放TOS客户端的上传线程池"""
+        if self.tos_client is not None:
+            self.tos_client.close()
+            self.tos_client = None
+    
     def _load_video_prompt_template(self) -> str:
         """加载视频生成提示词模板"""
         template_path = self.config.get('prompts', {}).get('video_prompt_template', './prompts/video_prompt.txt')
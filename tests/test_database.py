@@ -7,14 +7,24 @@
 
 import os
 import sys
+import shutil
 import tempfile
+import threading
 import time
 from pathlib import Path
 
 # 添加项目路径
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.database import DatabaseManager
+from utils.database import DatabaseManager, _TAG_EXTERNAL, _TAG_ZLIB, _TAG_ZSTD
+
+
+def _remove_db_files(db_path):
+    """删除测试数据库及其 WAL/SHM 文件和外部文本目录"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+    shutil.rmtree(db_path + '-blobs', ignore_errors=True)
 
 
 class TestDatabaseManager:
@@ -118,6 +128,70 @@ class TestDatabaseManager:
             if os.path.exists(test_db_path):
                 os.unlink(test_db_path)
     
+    def test_large_text_roundtrip(self):
+        """测试大文本压缩存储、外部存储与读取"""
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            test_db_path = f.name
+        
+        db = None
+        try:
+            db = DatabaseManager(test_db_path)
+            
+            # 约24KB：压缩后存入数据库
+            task_id = "test_task_compressed"
+            db.create_task(task_id, "压缩文本测试", "test.txt")
+            original = "很长的原始内容。" * 1000
+            db.save_text_parsing(
+                task_id=task_id,
+                original_content=original,
+                parsed_content="解析后内容",
+                word_count=8000,
+                chapters_found=1,
+                processing_time=1.0
+            )
+            
+            with db.get_connection() as conn:
+                stored = conn.execute(
+                    "SELECT original_content FROM text_parsing WHERE task_id = ?", (task_id,)
+                ).fetchone()[0]
+            assert stored[:1] in (_TAG_ZSTD, _TAG_ZLIB)
+            assert len(stored) < len(original.encode('utf-8'))
+            
+            record = db.get_text_parsing(task_id)
+            assert record is not None
+            assert record['original_content'] == original
+            assert record['parsed_content'] == "解析后内容"
+            
+            # 约120KB：写入外部存储，数据库中只保存摘要
+            task_id = "test_task_external"
+            db.create_task(task_id, "外部存储测试", "test.txt")
+            original = "很长的原始内容。" * 5000
+            db.save_text_parsing(
+                task_id=task_id,
+                original_content=original,
+                parsed_content="解析后内容",
+                word_count=40000,
+                chapters_found=1,
+                processing_time=1.0
+            )
+            
+            with db.get_connection() as conn:
+                stored = conn.execute(
+                    "SELECT original_content FROM text_parsing WHERE task_id = ?", (task_id,)
+                ).fetchone()[0]
+            assert stored[:1] == _TAG_EXTERNAL
+            
+            record = db.get_text_parsing(task_id)
+            assert record is not None
+            assert record['original_content'] == original
+            
+            print("✓ 大文本压缩存储功能正常")
+            
+        finally:
+            if db is not None:
+                db.close()
+            _remove_db_files(test_db_path)
+    
     def test_media_generation_storage(self):
         """测试媒体生成存储"""
         with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
@@ -239,6 +313,129 @@ class TestDatabaseManager:
         finally:
             if os.path.exists(test_db_path):
                 os.unlink(test_db_path)
+    
+    def test_media_generation_bulk(self):
+        """测试批量媒体记录存储"""
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            test_db_path = f.name
+        
+        db = None
+        try:
+            db = DatabaseManager(test_db_path)
+            
+            task_id = "bulk_task_001"
+            db.create_task(task_id, "批量存储测试", "test.txt")
+            
+            rows = [
+                (task_id, "image", f"图片 {i}", f"/path/to/{i}.png", 1024, 0.0, 0.025, 1.0)
+                for i in range(10)
+            ]
+            assert db.save_media_generation_bulk(rows)
+            
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM media_generation WHERE task_id = ?", (task_id,))
+                assert cursor.fetchone()[0] == 10
+            
+            print("✓ 批量媒体记录存储功能正常")
+            
+        finally:
+            if db is not None:
+                db.close()
+            _remove_db_files(test_db_path)
+    
+    def test_transaction(self):
+        """测试显式事务的提交与回滚"""
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            test_db_path = f.name
+        
+        db = None
+        try:
+            db = DatabaseManager(test_db_path)
+            
+            task_id = "txn_task_001"
+            db.create_task(task_id, "事务测试", "test.txt")
+            
+            with db.transaction():
+                for i in range(3):
+                    assert db.save_media_generation(
+                        task_id, "image", f"图片 {i}", f"/path/to/{i}.png", 1024, 0.0, 0.025, 1.0
+                    )
+            
+            try:
+                with db.transaction():
+                    db.save_media_generation(
+                        task_id, "image", "回滚图片", "/path/to/x.png", 1024, 0.0, 0.025, 1.0
+                    )
+                    raise RuntimeError("中断事务")
+            except RuntimeError:
+                pass
+            
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM media_generation WHERE task_id = ?", (task_id,))
+                assert cursor.fetchone()[0] == 3
+            
+            print("✓ 显式事务功能正常")
+            
+        finally:
+            if db is not None:
+                db.close()
+            _remove_db_files(test_db_path)
+    
+    def test_transaction_with_concurrent_writer(self):
+        """测试显式事务期间其他线程的写操作排队执行而不会因锁超时失败"""
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            test_db_path = f.name
+        
+        db = None
+        try:
+            db = DatabaseManager(test_db_path)
+            # 缩短锁等待时间，若事务与写线程争抢文件写锁会立即暴露
+            db._writer._conn.execute('PRAGMA busy_timeout=100')
+            
+            task_id = "txn_task_002"
+            db.create_task(task_id, "并发事务测试", "test.txt")
+            
+            started = threading.Event()
+            results = {}
+            
+            def hold_transaction():
+                with db.transaction():
+                    db.save_media_generation(
+                        task_id, "image", "事务内图片", "/path/to/a.png", 1024, 0.0, 0.025, 1.0
+                    )
+                    started.set()
+                    time.sleep(0.5)
+                results['committed_at'] = time.monotonic()
+            
+            def concurrent_write():
+                started.wait()
+                results['media_id'] = db.save_media_generation(
+                    task_id, "image", "并发图片", "/path/to/b.png", 1024, 0.0, 0.025, 1.0
+                )
+                results['written_at'] = time.monotonic()
+            
+            threads = [threading.Thread(target=hold_transaction), threading.Thread(target=concurrent_write)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            assert results['media_id'] is not None
+            assert results['written_at'] >= results['committed_at']
+            
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM media_generation WHERE task_id = ?", (task_id,))
+                assert cursor.fetchone()[0] == 2
+            
+            print("✓ 显式事务与并发写入功能正常")
+            
+        finally:
+            if db is not None:
+                db.close()
+            _remove_db_files(test_db_path)
 
 
 def run_database_tests():
@@ -251,10 +448,14 @@ def run_database_tests():
         test_db.test_database_initialization()
         test_db.test_task_operations()
         test_db.test_text_parsing_storage()
+        test_db.test_large_text_roundtrip()
         test_db.test_media_generation_storage()
         test_db.test_cost_tracking()
         test_db.test_task_statistics()
         test_db.test_list_tasks()
+        test_db.test_media_generation_bulk()
+        test_db.test_transaction()
+        test_db.test_transaction_with_concurrent_writer()
         
         print("数据库管理器测试全部通过! ✅")
         return True
@@ -9,6 +9,7 @@
 import os
 import sys
 import time
+import functools
 import threading
 from typing import Any, Dict, List, Optional, Union, Callable
 from dataclasses import dataclass
@@ -18,6 +19,21 @@ import argparse
 from .logger import LoggerMixin
 
 
+_MENU_RULE = "=" * 50
+
+
+@functools.lru_cache(maxsize=512)
+def _format_time(seconds: int) -> str:
+    """格式化时间显示（按整秒缓存）"""
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        minutes, secs = divmod(seconds, 60)
+        return f"{minutes}m{secs}s"
+    hours, rem = divmod(seconds, 3600)
+    return f"{hours}h{rem // 60}m"
+
+
 class ProgressStyle(Enum):
     """进度条样式"""
     BAR = "bar"
@@ -45,6 +61,15 @@ class CLITheme:
             self.spinner_chars = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
 
 
+@dataclass
+class _MenuOption:
+    """菜单选项"""
+    __slots__ = ('key', 'description', 'action')
+    key: str
+    description: str
+    action: Optional[Callable]
+
+
 class ProgressBar(LoggerMixin):
     """进度条组件"""
     
@@ -75,6 +100,8 @@ class ProgressBar(LoggerMixin):
         self._last_update = 0
         self._is_finished = False
         self._lock = threading.Lock()
+        # 非终端输出（CI、重定向到文件）时不渲染动态进度
+        self._is_tty = sys.stdout.isatty()
         
         # 动画相关
         self._spinner_index = 0
@@ -89,7 +116,8 @@ class ProgressBar(LoggerMixin):
             description: 当前操作描述
         """
         with self._lock:
-            self.current = min(self.current + amount, self.total)
+            current = self.current + amount
+            self.current = self.total if current > self.total else current
             self._render(description)
     
     def set_progress(self, current: int, description: str = ""):
@@ -101,12 +129,12 @@ class ProgressBar(LoggerMixin):
             description: 当前操作描述
         """
         with self._lock:
-            self.current = min(max(current, 0), self.total)
+            self.current = 0 if current < 0 else self.total if current > self.total else current
             self._render(description)
     
     def _render(self, description: str = ""):
         """渲染进度条"""
-        if self._is_finished:
+        if not self._is_tty or self._is_finished:
             return
         
         current_time = time.time()
@@ -198,7 +226,9 @@ class ProgressBar(LoggerMixin):
             elapsed_time = time.time() - self._start_time
             elapsed_str = self._format_time(elapsed_time)
             
-            if self.style == ProgressStyle.BAR:
+            if not self._is_tty:
+                print(f"{self.title}: {message} ({self.total}/{self.total}) - 用时: {elapsed_str}")
+            elif self.style == ProgressStyle.BAR:
                 bar = self.theme.progress_char * self.width
                 print(f"\r{self.title}: [{bar}] 100% ({self.total}/{self.total}) {message} - 用时: {elapsed_str}")
             else:
@@ -206,18 +236,14 @@ class ProgressBar(LoggerMixin):
     
     def _format_time(self, seconds: float) -> str:
         """格式化时间显示"""
-        if seconds < 60:
-            return f"{seconds:.0f}s"
-        elif seconds < 3600:
-            return f"{seconds//60:.0f}m{seconds%60:.0f}s"
-        else:
-            return f"{seconds//3600:.0f}h{(seconds%3600)//60:.0f}m"
+        return _format_time(int(seconds))
     
     def close(self):
         """关闭进度条"""
         if not self._is_finished:
             self.finish()
-        print()  # 换行
+        if self._is_tty:
+            print()  # 换行
 
 
 class CLIMenu:
@@ -233,7 +259,8 @@ class CLIMenu:
         """
         self.title = title
         self.theme = theme or CLITheme()
-        self.options = []
+        self.options: List[_MenuOption] = []
+        self._rendered_menu: Optional[str] = None
     
     def add_option(self, key: str, description: str, action: Callable = None):
         """
@@ -244,11 +271,8 @@ class CLIMenu:
             description: 选项描述
             action: 选项对应的动作
         """
-        self.options.append({
-            'key': key,
-            'description': description,
-            'action': action
-        })
+        self.options.append(_MenuOption(key, description, action))
+        self._rendered_menu = None
     
     def display(self) -> str:
         """
@@ -257,14 +281,14 @@ class CLIMenu:
         Returns:
             用户选择的选项键
         """
-        print(f"\n{'='*50}")
-        print(f"{self.title}")
-        print(f"{'='*50}")
-        
-        for option in self.options:
-            print(f"  {option['key']}. {option['description']}")
+        # 菜单文本只在选项变化后重新生成
+        if self._rendered_menu is None:
+            lines = [f"\n{_MENU_RULE}", self.title, _MENU_RULE]
+            lines.extend(f"  {option.key}. {option.description}" for option in self.options)
+            lines.append(_MENU_RULE)
+            self._rendered_menu = "\n".join(lines)
         
-        print(f"{'='*50}")
+        print(self._rendered_menu)
         
         while True:
             try:
@@ -272,7 +296,7 @@ class CLIMenu:
                 
                 # 查找匹配的选项
                 for option in self.options:
-                    if option['key'] == choice:
+                    if option.key == choice:
                         return choice
                 
                 print("无效选项，请重新输入")
@@ -294,8 +318,8 @@ class CLIMenu:
             动作执行结果
         """
         for option in self.options:
-            if option['key'] == choice and option['action']:
-                return option['action']()
+            if option.key == choice and option.action:
+                return option.action()
         return None
 
 
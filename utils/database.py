@@ -8,159 +8,1038 @@
 
 import sqlite3
 import json
+import atexit
+import hashlib
 import time
-from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+import queue
+import threading
+import os
+import zlib
+import functools
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator, NamedTuple
 from pathlib import Path
 from .logger import LoggerMixin
 from .file_utils import FileUtils
 
+try:
+    import zstandard
+except ImportError:  # 未安装zstandard时退回标准库zlib
+    zstandard = None
+
+
+# 连接级别的PRAGMA，每个新连接都需要重新设置
+# journal_mode=WAL 会持久化到数据库文件，只需在初始化时设置一次
+_CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=1073741824',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA foreign_keys=ON',
+)
+
+# 状态对应需要记录时间戳的字段
+_STATUS_TIMESTAMP_COLUMNS = {
+    'processing': 'started_at',
+    'completed': 'completed_at',
+    'failed': 'completed_at',
+}
+
+# 预先生成所有状态更新语句，保持SQL文本固定以命中语句缓存
+_UPDATE_STATUS_SQL = {
+    (column, has_error): (
+        'UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP'
+        + (f', {column} = CURRENT_TIMESTAMP' if column else '')
+        + (', error_message = ?' if has_error else '')
+        + ' WHERE task_id = ?'
+    )
+    for column in (None, 'started_at', 'completed_at')
+    for has_error in (False, True)
+}
+
+# 数据库结构（表）
+_SCHEMA_TABLES = '''
+-- 任务记录表
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    completed_at TIMESTAMP NULL,
+    error_message TEXT NULL,
+    retry_count INTEGER DEFAULT 0,
+    metadata BLOB NULL
+);
+
+-- 文本解析记录表
+CREATE TABLE IF NOT EXISTS text_parsing (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    original_content BLOB NOT NULL,
+    parsed_content BLOB NOT NULL,
+    word_count INTEGER NOT NULL,
+    chapters_found INTEGER DEFAULT 0,
+    processing_time REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks (task_id) ON DELETE CASCADE
+);
+
+-- LLM脚本生成记录表
+CREATE TABLE IF NOT EXISTS llm_scripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    prompt BLOB NOT NULL,
+    response BLOB NOT NULL,
+    script_data BLOB NOT NULL,
+    tokens_used INTEGER DEFAULT 0,
+    cost REAL DEFAULT 0.0,
+    processing_time REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks (task_id) ON DELETE CASCADE
+);
+
+-- 媒体生成记录表
+CREATE TABLE IF NOT EXISTS media_generation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    media_type TEXT NOT NULL, -- 'image', 'video', 'audio'
+    description TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_size INTEGER DEFAULT 0,
+    duration REAL DEFAULT 0.0,
+    cost REAL DEFAULT 0.0,
+    processing_time REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks (task_id) ON DELETE CASCADE
+);
+
+-- 最终视频记录表
+CREATE TABLE IF NOT EXISTS final_videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    video_path TEXT NOT NULL,
+    duration REAL NOT NULL,
+    file_size INTEGER NOT NULL,
+    resolution TEXT NOT NULL,
+    total_cost REAL DEFAULT 0.0,
+    total_processing_time REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (task_id) REFERENCES tasks (task_id) ON DELETE CASCADE
+);
+
+-- 成本统计表
+CREATE TABLE IF NOT EXISTS cost_tracking (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL, -- YYYY-MM-DD格式
+    service_type TEXT NOT NULL, -- 'llm', 'text2image', 'image2video', 'tts'
+    request_count INTEGER DEFAULT 0,
+    total_cost REAL DEFAULT 0.0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(date, service_type)
+);
+
+-- 系统配置表
+CREATE TABLE IF NOT EXISTS system_config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+# 数据库结构（索引）
+_SCHEMA_INDEXES = '''
+-- (status, created_at) 复合索引同时覆盖按状态筛选+时间排序，取代单列status索引
+DROP INDEX IF EXISTS idx_tasks_status;
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks(status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_textparse_task ON text_parsing(task_id);
+CREATE INDEX IF NOT EXISTS idx_llmscripts_task ON llm_scripts(task_id);
+CREATE INDEX IF NOT EXISTS idx_media_task_id ON media_generation(task_id);
+CREATE INDEX IF NOT EXISTS idx_finalvideos_task ON final_videos(task_id);
+CREATE INDEX IF NOT EXISTS idx_cost_date ON cost_tracking(date);
+'''
+
+# 结构哈希记录在 system_config 中，未变化时跳过初始化
+_SCHEMA_HASH = hashlib.sha256((_SCHEMA_TABLES + _SCHEMA_INDEXES).encode('utf-8')).hexdigest()
+
+_CLEANUP_TASKS_SQL = '''
+    DELETE FROM tasks 
+    WHERE status IN ('completed', 'failed') 
+    AND created_at < datetime('now', ?)
+'''
+
+# 通过外键 ON DELETE CASCADE 随任务一起删除的子表
+_TASK_CHILD_TABLES = ('text_parsing', 'llm_scripts', 'media_generation', 'final_videos')
+
+
+_INSERT_MEDIA_SQL = '''
+    INSERT INTO media_generation 
+    (task_id, media_type, description, file_path, file_size, duration, cost, processing_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _encode_json(data: Any) -> bytes:
+    """将对象编码为紧凑的UTF-8 JSON字节，以BLOB形式存储"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# 大文本列以 1字节标记 + 数据 的BLOB存储；过小的内容不压缩，避免浪费CPU
+_COMPRESS_MIN_BYTES = 1024
+# 超过该大小的文本写入外部内容寻址文件，数据库中只保存哈希
+_EXTERNAL_BLOB_BYTES = 64 * 1024
+_TAG_RAW = b'\x00'
+_TAG_ZLIB = b'\x01'
+_TAG_ZSTD = b'\x02'
+_TAG_EXTERNAL = b'\x03'
+
+# 未被引用的外部文本超过该时长（秒）未被写入或复用才会被清理，
+# 避免删除已写入文件但记录尚未提交的内容
+_BLOB_SWEEP_GRACE = 3600
+# 外部文本文件的写入/复用与清理互斥（进程内）
+_blob_lock = threading.Lock()
+
+# 可能引用外部文本的列
+_BLOB_REFERENCES_SQL = '''
+    SELECT substr(original_content, 2) FROM text_parsing WHERE substr(original_content, 1, 1) = X'03'
+    UNION
+    SELECT substr(parsed_content, 2) FROM text_parsing WHERE substr(parsed_content, 1, 1) = X'03'
+'''
+
+
+def _pack_bytes(data: bytes) -> bytes:
+    """将UTF-8数据编码为带标记的（压缩）BLOB"""
+    if len(data) < _COMPRESS_MIN_BYTES:
+        return _TAG_RAW + data
+    if zstandard is not None:
+        return _TAG_ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    return _TAG_ZLIB + zlib.compress(data, 3)
+
+
+def _pack_text(text: str) -> bytes:
+    """将大文本编码为带标记的（压缩）BLOB"""
+    return _pack_bytes(text.encode('utf-8'))
+
+
+def _unpack_text(value: Any, blob_store: Optional['BlobStore'] = None) -> Optional[str]:
+    """解码 _pack_text 生成的BLOB；旧版本写入的TEXT原样返回"""
+    if value is None or isinstance(value, str):
+        return value
+    
+    tag, data = value[:1], value[1:]
+    if tag == _TAG_RAW:
+        return data.decode('utf-8')
+    if tag == _TAG_ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    if tag == _TAG_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("读取压缩数据需要zstandard依赖，请安装：pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    if tag == _TAG_EXTERNAL:
+        if blob_store is None:
+            raise RuntimeError("读取外部存储的文本需要提供BlobStore")
+        return blob_store.get_text(data.decode('ascii'))
+    raise ValueError(f"未知的文本存储标记: {tag!r}")
+
+
+class BlobStore:
+    """
+    内容寻址的外部文本存储
+    
+    文件按内容的sha256命名并存放在 <root>/<sha256前2位>/<sha256>.blob，
+    文件内容与数据库内的压缩BLOB格式一致，相同内容只保存一份。
+    不再被数据库引用的文件由 sweep 清理。
+    """
+    
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: 存储根目录
+        """
+        self.root = Path(root)
+    
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.blob"
+    
+    def put_bytes(self, data: bytes) -> str:
+        """
+        保存UTF-8文本数据
+        
+        Returns:
+            内容的sha256十六进制摘要
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with _blob_lock:
+            try:
+                # 复用已有文件时刷新修改时间，防止在记录提交前被 sweep 清理
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                pass
+            
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，避免并发写入产生半截文件
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(_pack_bytes(data))
+            os.replace(tmp_path, path)
+        return digest
+    
+    def get_text(self, digest: str) -> str:
+        """按摘要读取文本"""
+        return _unpack_text(self._path(digest).read_bytes())
+    
+    def sweep(self, referenced: set, grace: float = _BLOB_SWEEP_GRACE) -> int:
+        """
+        删除不再被引用的文件（及遗留的临时文件）
+        
+        Args:
+            referenced: 数据库中仍被引用的摘要集合
+            grace: 最近该秒数内写入或复用过的文件不删除
+            
+        Returns:
+            删除的文件数量
+        """
+        cutoff = time.time() - grace
+        removed = 0
+        try:
+            shards = [entry.path for entry in os.scandir(self.root) if entry.is_dir()]
+        except FileNotFoundError:
+            return 0
+        
+        for shard in shards:
+            with os.scandir(shard) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.endswith('.blob') and name[:-5] in referenced:
+                        continue
+                    with _blob_lock:
+                        try:
+                            if entry.stat().st_mtime >= cutoff:
+                                continue
+                            os.unlink(entry.path)
+                            removed += 1
+                        except FileNotFoundError:
+                            pass
+        return removed
+
+
+class MetadataProxy(Mapping):
+    """
+    延迟解析的JSON元数据，首次访问内容时才执行json.loads
+    
+    实例随任务缓存在线程间共享：原始数据始终保留，并发首次访问最多重复解析一次。
+    """
+    
+    __slots__ = ('_raw', '_data')
+    
+    def __init__(self, raw: Any):
+        """
+        Args:
+            raw: 数据库中存储的JSON（bytes或旧版本写入的str）
+        """
+        self._raw = raw
+        self._data: Optional[Dict[str, Any]] = None
+    
+    def _load(self) -> Dict[str, Any]:
+        data = self._data
+        if data is None:
+            data = self._data = json.loads(self._raw)
+        return data
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+    
+    def __iter__(self):
+        return iter(self._load())
+    
+    def __len__(self) -> int:
+        return len(self._load())
+    
+    def __repr__(self) -> str:
+        return repr(self._load())
+
+
+# tasks 表查询字段（顺序与 _TaskRow 构造参数一致）
+_TASK_COLUMNS = (
+    'id', 'task_id', 'title', 'source_file', 'status', 'created_at', 'updated_at',
+    'started_at', 'completed_at', 'error_message', 'retry_count', 'metadata',
+)
+_TASK_COLUMN_SET = frozenset(_TASK_COLUMNS)
+_TASK_SELECT = f"SELECT {', '.join(_TASK_COLUMNS)} FROM tasks"
+
+# 明细表按固定列顺序查询，结果按位置组装成字典，避免 sqlite3.Row 的逐列查找
+_TEXT_PARSING_COLUMNS = (
+    'id', 'task_id', 'original_content', 'parsed_content', 'word_count',
+    'chapters_found', 'processing_time', 'created_at',
+)
+_LLM_SCRIPT_COLUMNS = (
+    'id', 'task_id', 'prompt', 'response', 'script_data', 'tokens_used',
+    'cost', 'processing_time', 'created_at',
+)
+
+
+class _TaskRow(Mapping):
+    """
+    只读任务记录，使用 __slots__ 存储字段，metadata 延迟解析
+    
+    get_task 的缓存直接返回同一实例，因此禁止修改属性。
+    """
+    
+    __slots__ = _TASK_COLUMNS
+    
+    def __init__(self, id, task_id, title, source_file, status, created_at, updated_at,
+                 started_at, completed_at, error_message, retry_count, metadata):
+        set_field = object.__setattr__
+        set_field(self, 'id', id)
+        set_field(self, 'task_id', task_id)
+        set_field(self, 'title', title)
+        set_field(self, 'source_file', source_file)
+        set_field(self, 'status', status)
+        set_field(self, 'created_at', created_at)
+        set_field(self, 'updated_at', updated_at)
+        set_field(self, 'started_at', started_at)
+        set_field(self, 'completed_at', completed_at)
+        set_field(self, 'error_message', error_message)
+        set_field(self, 'retry_count', retry_count)
+        set_field(self, 'metadata', MetadataProxy(metadata) if metadata else None)
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"任务记录只读，不能修改字段: {name}")
+    
+    def __delattr__(self, name: str):
+        raise AttributeError(f"任务记录只读，不能删除字段: {name}")
+    
+    @classmethod
+    def from_row(cls, cursor: sqlite3.Cursor, row: Tuple) -> '_TaskRow':
+        """sqlite3 row_factory 适配"""
+        return cls(*row)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in _TASK_COLUMN_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(_TASK_COLUMNS)
+    
+    def __len__(self) -> int:
+        return len(_TASK_COLUMNS)
+    
+    def __repr__(self) -> str:
+        return f"_TaskRow({dict(self)!r})"
+
+
+class _ConnectionPool:
+    """SQLite连接池，复用长连接以保持页缓存常驻"""
+    
+    def __init__(self, factory: Callable[[], sqlite3.Connection], maxsize: int = 4):
+        """
+        初始化连接池
+        
+        Args:
+            factory: 创建新连接的工厂函数
+            maxsize: 最多保留的空闲连接数
+        """
+        self._factory = factory
+        self._idle: queue.Queue = queue.Queue(maxsize=maxsize)
+        # SQLite在文件级别串行化写入，进程内先排队，避免SQLITE_BUSY重试
+        self._write_lock = threading.Lock()
+    
+    def _checkout(self) -> sqlite3.Connection:
+        """取出一个可用连接，空闲连接不足时惰性创建"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._factory()
+            
+            # 健康检查，失效的连接直接丢弃
+            try:
+                conn.execute('SELECT 1')
+                return conn
+            except sqlite3.Error:
+                self._discard(conn)
+    
+    def _checkin(self, conn: sqlite3.Connection):
+        """归还连接，池满时关闭多余连接"""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+    
+    @staticmethod
+    def _discard(conn: sqlite3.Connection):
+        """关闭连接，关闭前刷新查询规划器统计信息"""
+        try:
+            conn.execute('PRAGMA optimize')
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def acquire(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        借出连接并在退出时归还
+        
+        连接工作在自动提交模式下；写操作会显式开启 BEGIN IMMEDIATE 事务，
+        正常退出时提交，异常时回滚。
+        
+        Args:
+            write: 是否为写操作（写操作串行执行）
+        """
+        conn = self._checkout()
+        if write:
+            self._write_lock.acquire()
+        try:
+            if write:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                conn.execute('COMMIT')
+            else:
+                yield conn
+        finally:
+            if write:
+                self._write_lock.release()
+            self._checkin(conn)
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class _WriteResult(NamedTuple):
+    """写操作结果（新记录ID取自 lastrowid，不使用需要 SQLite 3.35+ 的 RETURNING）"""
+    lastrowid: Optional[int]
+    rowcount: int
+
+
+# 写线程队列中的独占事务请求标记：(_EXCLUSIVE, 结束事件, False, 连接就绪Future)
+_EXCLUSIVE = object()
+
+
+class _WriterThread(threading.Thread):
+    """
+    专用写线程
+    
+    所有写操作经队列交给同一个长连接串行执行；队列中已积压的写入会合并到
+    同一个事务中提交（group commit），避免多线程争抢写锁。
+    显式事务（exclusive）同样排队，轮到时由调用线程借用写连接执行，期间其他写操作继续排队等待。
+    """
+    
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        max_batch: int = 256,
+        checkpoint_commits: int = 1000,
+        checkpoint_interval: float = 60.0
+    ):
+        """
+        Args:
+            conn: 写线程独占的数据库连接
+            max_batch: 单个事务最多合并的写操作数
+            checkpoint_commits: 累计提交多少次后执行一次WAL检查点
+            checkpoint_interval: 有新提交时最长多少秒执行一次WAL检查点
+        """
+        super().__init__(name='sqlite-writer', daemon=True)
+        self._conn = conn
+        self._max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._checkpoint_commits = checkpoint_commits
+        self._checkpoint_interval = checkpoint_interval
+        self._commits_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        # 停止后拒绝新的写操作；与入队共用同一把锁，保证停止标记之后不会再有写入排队
+        self._stopped = False
+        self._state_lock = threading.Lock()
+        self._inflight: List[Tuple] = []
+        # 各线程当前借用中的事务连接（供嵌套事务和块内写操作使用）
+        self.local = threading.local()
+        # 共享写线程的文件标识与引用数（由 _acquire_writer/_release_writer 维护）
+        self.file_key: Optional[Tuple[int, int]] = None
+        self.refs = 0
+    
+    def submit(self, sql: str, params: Any = (), many: bool = False) -> Future:
+        """
+        提交写操作
+        
+        Args:
+            sql: SQL语句
+            params: 参数（many=True 时为参数序列）
+            many: 是否使用 executemany
+            
+        Returns:
+            事务提交后完成的Future，结果为 _WriteResult
+            
+        Raises:
+            RuntimeError: 写线程已停止时抛出
+        """
+        future: Future = Future()
+        with self._state_lock:
+            if self._stopped or not self.is_alive():
+                raise RuntimeError("数据库写线程已停止")
+            self._queue.put((sql, params, many, future))
+        return future
+    
+    @contextmanager
+    def exclusive(self) -> Iterator[sqlite3.Connection]:
+        """
+        在写连接上开启显式事务，由调用线程在块内直接执行语句
+        
+        请求与普通写操作一起排队，轮到时写线程执行 BEGIN IMMEDIATE 并把连接交给调用线程；
+        正常退出时提交，异常时回滚。事务期间写线程等待，其他写操作排队而不会因锁超时失败。
+        
+        Raises:
+            RuntimeError: 写线程已停止时抛出
+        """
+        finished = threading.Event()
+        ready: Future = Future()
+        with self._state_lock:
+            if self._stopped or not self.is_alive():
+                raise RuntimeError("数据库写线程已停止")
+            self._queue.put((_EXCLUSIVE, finished, False, ready))
+        
+        try:
+            conn = ready.result()
+        except BaseException:
+            # 等待期间被中断：写线程轮到该请求时会直接回滚
+            finished.set()
+            raise
+        
+        try:
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        finally:
+            finished.set()
+    
+    def stop(self):
+        """处理完已排队的写操作后退出并关闭连接（可重复调用）"""
+        with self._state_lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put(None)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+    
+    def run(self):
+        try:
+            self._run()
+        finally:
+            # 写线程异常退出时，让执行中和仍在排队的写操作立即失败而不是永久等待
+            with self._state_lock:
+                self._stopped = True
+            pending = self._inflight
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+            for item in pending:
+                if not item[3].done():
+                    item[3].set_exception(RuntimeError("数据库写线程已停止"))
+    
+    def _run(self):
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self._checkpoint_interval)]
+            except queue.Empty:
+                self._maybe_checkpoint()
+                continue
+            # 不额外等待，只合并已经在队列中的写操作
+            while len(batch) < self._max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            # 按入队顺序执行：普通写操作合并提交，独占事务请求单独处理
+            start = 0
+            for index, item in enumerate(batch):
+                if item[0] is _EXCLUSIVE:
+                    self._commit_batch(batch[start:index])
+                    self._run_exclusive(item)
+                    start = index + 1
+            self._commit_batch(batch[start:])
+        
+        self._conn.close()
+    
+    def _commit_batch(self, batch: List[Tuple]):
+        """在一个事务中执行一批普通写操作"""
+        if not batch:
+            return
+        self._inflight = batch
+        self._execute_batch(batch)
+        self._inflight = []
+        self._commits_since_checkpoint += 1
+        self._maybe_checkpoint()
+    
+    def _run_exclusive(self, item: Tuple):
+        """开启事务并把写连接交给请求线程，等待其提交或回滚"""
+        _, finished, _, ready = item
+        if finished.is_set():
+            return
+        
+        self._inflight = [item]
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            self._inflight = []
+            ready.set_exception(e)
+            return
+        ready.set_result(self._conn)
+        finished.wait()
+        self._inflight = []
+        
+        # 提交失败或请求在交付前已中断时，事务可能仍未结束
+        if self._conn.in_transaction:
+            try:
+                self._conn.execute('ROLLBACK')
+            except sqlite3.Error:
+                pass
+        self._commits_since_checkpoint += 1
+        self._maybe_checkpoint()
+    
+    def _maybe_checkpoint(self):
+        """
+        提交次数或间隔达到阈值时执行 PASSIVE 检查点，控制WAL文件大小
+        
+        PASSIVE 不等待读者，不会造成写入长尾；持久性由 WAL + synchronous=NORMAL 保证，
+        因此不在提交路径上使用 FULL/TRUNCATE。
+        """
+        if not self._commits_since_checkpoint:
+            return
+        if (self._commits_since_checkpoint < self._checkpoint_commits
+                and time.monotonic() - self._last_checkpoint < self._checkpoint_interval):
+            return
+        
+        try:
+            self._conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        except sqlite3.Error:
+            pass
+        self._commits_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+    
+    def _execute_batch(self, batch: List[Tuple]):
+        """在一个事务中执行一批写操作，每个操作使用独立保存点互不影响"""
+        outcomes = []
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for sql, params, many, future in batch:
+                self._conn.execute('SAVEPOINT write_item')
+                try:
+                    if many:
+                        cursor = self._conn.executemany(sql, params)
+                    else:
+                        cursor = self._conn.execute(sql, params)
+                    outcome = _WriteResult(cursor.lastrowid, cursor.rowcount)
+                except Exception as e:
+                    self._conn.execute('ROLLBACK TO write_item')
+                    outcome = e
+                self._conn.execute('RELEASE write_item')
+                outcomes.append((future, outcome))
+            self._conn.execute('COMMIT')
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute('ROLLBACK')
+            for item in batch:
+                item[3].set_exception(e)
+            return
+        
+        for future, outcome in outcomes:
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+# 每个数据库文件在进程内只保留一个写线程：{(st_dev, st_ino): 写线程}
+# 按文件标识而非路径区分：数据库文件被删除重建后，旧写线程的连接仍指向已删除的文件
+_writers: Dict[Tuple[int, int], _WriterThread] = {}
+_writers_lock = threading.Lock()
+
+
+def _acquire_writer(db_path: str, connect: Callable[[], sqlite3.Connection]) -> _WriterThread:
+    """
+    获取数据库文件对应的共享写线程，不存在或已停止时创建
+    
+    Args:
+        db_path: 已解析的数据库绝对路径（文件必须已存在）
+        connect: 创建写连接的工厂函数
+        
+    Returns:
+        写线程
+    """
+    stat = os.stat(db_path)
+    file_key = (stat.st_dev, stat.st_ino)
+    with _writers_lock:
+        writer = _writers.get(file_key)
+        if writer is None or not writer.is_alive():
+            writer = _WriterThread(connect())
+            writer.file_key = file_key
+            writer.start()
+            _writers[file_key] = writer
+        writer.refs += 1
+        return writer
+
+
+def _release_writer(writer: _WriterThread):
+    """释放共享写线程的一个引用，最后一个引用释放时停止写线程"""
+    with _writers_lock:
+        writer.refs -= 1
+        if writer.refs > 0:
+            return
+        if _writers.get(writer.file_key) is writer:
+            del _writers[writer.file_key]
+    writer.stop()
+
+
+@atexit.register
+def _stop_all_writers():
+    """进程退出前提交所有已排队的写操作"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+
+@functools.lru_cache(maxsize=64)
+def _ensure_parent(directory: str) -> str:
+    """
+    确保数据库所在目录存在（按目录缓存，同一目录下重复创建管理器时不再触发stat）
+    
+    Args:
+        directory: 已解析的绝对目录路径
+        
+    Returns:
+        目录路径
+    """
+    if not os.path.isdir(directory):
+        FileUtils.ensure_dir(directory)
+    return directory
+
 
 class DatabaseManager(LoggerMixin):
     """数据库管理器"""
     
-    def __init__(self, db_path: str = "./data/database.db"):
+    def __init__(self, db_path: str = "./data/database.db", task_cache_size: int = 256):
         """
         初始化数据库管理器
         
         Args:
             db_path: 数据库文件路径
+            task_cache_size: get_task 进程内LRU缓存的最大条目数
         """
-        self.db_path = db_path
+        # 只解析一次绝对路径，后续连接直接使用字符串
+        self.db_path = os.fspath(Path(db_path).resolve())
+        db_dir = os.path.dirname(self.db_path)
+        
+        # get_task 的LRU缓存；版本号在每次失效时递增，防止并发查询写回过期数据
+        self._task_cache: "OrderedDict[str, _TaskRow]" = OrderedDict()
+        self._task_cache_size = task_cache_size
+        self._task_cache_version = 0
+        self._task_cache_lock = threading.Lock()
         
         # 确保数据库目录存在
-        FileUtils.ensure_dir(Path(db_path).parent)
+        _ensure_parent(db_dir)
+        
+        # 超大文本的外部存储，与 -wal/-shm 一样按数据库文件区分，不同数据库互不共享
+        self._blobs = BlobStore(f"{self.db_path}-blobs")
+        
+        # 长连接池，避免每次调用重新连接并丢失页缓存
+        self._pool = _ConnectionPool(self._connect)
         
         # 初始化数据库
         self._init_database()
+        
+        # 写操作统一交给专用写线程（同一数据库文件的所有管理器共享），
+        # 读操作直接使用连接池（WAL下读写并发）
+        self._writer: Optional[_WriterThread] = _acquire_writer(self.db_path, self._connect)
     
     def get_connection(self):
         """获取数据库连接（主要用于测试）"""
-        return sqlite3.connect(self.db_path)
+        return self._connect()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """创建已应用性能PRAGMA的数据库连接"""
+        # isolation_level=None: 由连接池显式管理事务
+        # detect_types=0: 不做列类型嗅探，时间戳保持原始字符串
+        conn = sqlite3.connect(
+            self.db_path,
+            detect_types=0,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def close(self):
+        """释放写线程并关闭连接池中的所有连接（可重复调用）"""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            _release_writer(writer)
+        self._pool.close()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        显式事务：块内当前线程的所有 save_*/update_* 写操作合并为一次提交
+        
+        事务在共享写线程的连接上执行（排队轮到后开始），与其他线程的写操作串行，
+        不会与写线程争抢文件写锁；正常退出时提交，异常时整体回滚。
+        嵌套调用会并入外层事务。块内的读操作使用其他连接，看不到尚未提交的写入。
+        
+        Yields:
+            事务所在的数据库连接
+        """
+        writer = self._writer
+        if writer is None:
+            raise RuntimeError("数据库管理器已关闭")
+        conn = getattr(writer.local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        try:
+            with writer.exclusive() as conn:
+                writer.local.conn = conn
+                try:
+                    yield conn
+                finally:
+                    writer.local.conn = None
+        finally:
+            # 事务期间其他线程可能缓存了提交前的任务数据
+            self._invalidate_task()
+    
+    def _write(self, sql: str, params: Any = (), many: bool = False) -> _WriteResult:
+        """执行写操作并等待提交完成（处于显式事务中时直接在事务连接上执行）"""
+        writer = self._writer
+        if writer is None:
+            raise RuntimeError("数据库管理器已关闭")
+        conn = getattr(writer.local, 'conn', None)
+        if conn is None:
+            return writer.submit(sql, params, many).result()
+        
+        # 与写线程一致：单条失败只回滚自身，不影响事务中的其他写入
+        conn.execute('SAVEPOINT write_item')
+        try:
+            if many:
+                cursor = conn.executemany(sql, params)
+            else:
+                cursor = conn.execute(sql, params)
+            result = _WriteResult(cursor.lastrowid, cursor.rowcount)
+        except Exception:
+            conn.execute('ROLLBACK TO write_item')
+            raise
+        finally:
+            conn.execute('RELEASE write_item')
+        return result
     
     def _init_database(self):
-        """初始化数据库表结构"""
+        """初始化数据库表结构（结构未变化时跳过）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 任务记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id TEXT UNIQUE NOT NULL,
-                        title TEXT NOT NULL,
-                        source_file TEXT NOT NULL,
-                        status TEXT DEFAULT 'pending',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        started_at TIMESTAMP NULL,
-                        completed_at TIMESTAMP NULL,
-                        error_message TEXT NULL,
-                        retry_count INTEGER DEFAULT 0,
-                        metadata TEXT NULL
-                    )
-                ''')
-                
-                # 文本解析记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS text_parsing (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id TEXT NOT NULL,
-                        original_content TEXT NOT NULL,
-                        parsed_content TEXT NOT NULL,
-                        word_count INTEGER NOT NULL,
-                        chapters_found INTEGER DEFAULT 0,
-                        processing_time REAL NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (task_id) REFERENCES tasks (task_id)
-                    )
-                ''')
-                
-                # LLM脚本生成记录表  
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS llm_scripts (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id TEXT NOT NULL,
-                        prompt TEXT NOT NULL,
-                        response TEXT NOT NULL,
-                        script_data TEXT NOT NULL,
-                        tokens_used INTEGER DEFAULT 0,
-                        cost REAL DEFAULT 0.0,
-                        processing_time REAL NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (task_id) REFERENCES tasks (task_id)
-                    )
-                ''')
+            with self._pool.acquire() as conn:
+                # WAL模式：读写互不阻塞，提交时无需每次fsync（不能在事务内切换）
+                conn.execute('PRAGMA journal_mode=WAL')
                 
-                # 媒体生成记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS media_generation (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id TEXT NOT NULL,
-                        media_type TEXT NOT NULL, -- 'image', 'video', 'audio'
-                        description TEXT NOT NULL,
-                        file_path TEXT NOT NULL,
-                        file_size INTEGER DEFAULT 0,
-                        duration REAL DEFAULT 0.0,
-                        cost REAL DEFAULT 0.0,
-                        processing_time REAL NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (task_id) REFERENCES tasks (task_id)
-                    )
-                ''')
+                if self._schema_is_current(conn):
+                    self.logger.debug("数据库结构已是最新")
+                    return
                 
-                # 最终视频记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS final_videos (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id TEXT NOT NULL,
-                        video_path TEXT NOT NULL,
-                        duration REAL NOT NULL,
-                        file_size INTEGER NOT NULL,
-                        resolution TEXT NOT NULL,
-                        total_cost REAL DEFAULT 0.0,
-                        total_processing_time REAL NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (task_id) REFERENCES tasks (task_id)
-                    )
-                ''')
+                legacy_tables = self._find_legacy_child_tables(conn)
                 
-                # 成本统计表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS cost_tracking (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT NOT NULL, -- YYYY-MM-DD格式
-                        service_type TEXT NOT NULL, -- 'llm', 'text2image', 'image2video', 'tts'
-                        request_count INTEGER DEFAULT 0,
-                        total_cost REAL DEFAULT 0.0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(date, service_type)
+                # 整个初始化在一个事务、一次脚本调用中完成
+                script = ['BEGIN IMMEDIATE;']
+                script.extend(f'ALTER TABLE {table} RENAME TO {table}_legacy;' for table in legacy_tables)
+                script.append(_SCHEMA_TABLES)
+                # 将旧表数据迁移到带级联外键的新表（孤立记录不再保留）
+                for table in legacy_tables:
+                    script.append(
+                        f'INSERT INTO {table} SELECT * FROM {table}_legacy '
+                        f'WHERE task_id IN (SELECT task_id FROM tasks);'
                     )
-                ''')
+                    script.append(f'DROP TABLE {table}_legacy;')
+                script.append(_SCHEMA_INDEXES)
+                script.append(
+                    "INSERT INTO system_config (key, value) VALUES ('schema_hash', '%s') "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                    "updated_at = CURRENT_TIMESTAMP;" % _SCHEMA_HASH
+                )
+                script.append('COMMIT;')
                 
-                # 系统配置表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS system_config (
-                        key TEXT PRIMARY KEY,
-                        value TEXT NOT NULL,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                try:
+                    conn.executescript('\n'.join(script))
+                except Exception:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    raise
                 
-                # 创建索引
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_task_id ON media_generation(task_id)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_cost_date ON cost_tracking(date)')
-                
-                conn.commit()
                 self.logger.info("数据库初始化完成")
                 
         except Exception as e:
             self.logger.error(f"数据库初始化失败: {e}")
             raise
     
+    @staticmethod
+    def _schema_is_current(conn: sqlite3.Connection) -> bool:
+        """检查数据库中记录的结构哈希是否与当前代码一致"""
+        try:
+            row = conn.execute(
+                "SELECT value FROM system_config WHERE key = 'schema_hash'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # system_config 表尚不存在
+            return False
+        return row is not None and row[0] == _SCHEMA_HASH
+    
+    def _find_legacy_child_tables(self, conn: sqlite3.Connection) -> List[str]:
+        """
+        查找外键缺少 ON DELETE CASCADE 的旧版子表
+        
+        Returns:
+            需要重建并迁移数据的表名列表
+        """
+        legacy_tables = []
+        for table in _TASK_CHILD_TABLES:
+            foreign_keys = conn.execute(f'PRAGMA foreign_key_list({table})').fetchall()
+            # 第7列为 on_delete 动作
+            if foreign_keys and foreign_keys[0][6] != 'CASCADE':
+                legacy_tables.append(table)
+        
+        if legacy_tables:
+            self.logger.info(f"迁移旧版数据表以启用级联删除: {', '.join(legacy_tables)}")
+        return legacy_tables
+    
     def create_task(
         self, 
         task_id: str, 
@@ -181,22 +1060,19 @@ class DatabaseManager(LoggerMixin):
             是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO tasks (task_id, title, source_file, metadata)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    task_id, 
-                    title, 
-                    source_file,
-                    json.dumps(metadata) if metadata else None
-                ))
-                
-                conn.commit()
-                self.logger.info(f"任务创建成功: {task_id}")
-                return True
+            self._write('''
+                INSERT INTO tasks (task_id, title, source_file, metadata)
+                VALUES (?, ?, ?, ?)
+            ''', (
+                task_id, 
+                title, 
+                source_file,
+                _encode_json(metadata) if metadata else None
+            ))
+            
+            self._invalidate_task(task_id)
+            self.logger.info(f"任务创建成功: {task_id}")
+            return True
                 
         except sqlite3.IntegrityError:
             self.logger.warning(f"任务已存在: {task_id}")
@@ -223,61 +1099,78 @@ class DatabaseManager(LoggerMixin):
             是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 准备更新字段
-                update_fields = ['status = ?', 'updated_at = CURRENT_TIMESTAMP']
-                params = [status]
-                
-                if status == 'processing':
-                    update_fields.append('started_at = CURRENT_TIMESTAMP')
-                elif status in ['completed', 'failed']:
-                    update_fields.append('completed_at = CURRENT_TIMESTAMP')
-                
-                if error_message:
-                    update_fields.append('error_message = ?')
-                    params.append(error_message)
-                
-                params.append(task_id)
-                
-                sql = f"UPDATE tasks SET {', '.join(update_fields)} WHERE task_id = ?"
-                cursor.execute(sql, params)
-                
-                if cursor.rowcount == 0:
-                    self.logger.warning(f"任务不存在: {task_id}")
-                    return False
-                
-                conn.commit()
-                self.logger.debug(f"任务状态更新: {task_id} -> {status}")
-                return True
+            has_error = bool(error_message)
+            sql = _UPDATE_STATUS_SQL[(_STATUS_TIMESTAMP_COLUMNS.get(status), has_error)]
+            params = (status, error_message, task_id) if has_error else (status, task_id)
+            
+            # 影响行数为0即任务不存在（不使用 RETURNING，兼容 SQLite 3.35 以下版本）
+            updated = self._write(sql, params).rowcount
+            self._invalidate_task(task_id)
+            if not updated:
+                self.logger.warning(f"任务不存在: {task_id}")
+                return False
+            
+            self.logger.debug(f"任务状态更新: {task_id} -> {status}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"更新任务状态失败: {e}")
             return False
     
-    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+    def _pack_content(self, text: str) -> bytes:
+        """编码大文本列，超过阈值时转存到外部BlobStore"""
+        data = text.encode('utf-8')
+        if len(data) > _EXTERNAL_BLOB_BYTES:
+            return _TAG_EXTERNAL + self._blobs.put_bytes(data).encode('ascii')
+        return _pack_bytes(data)
+    
+    def _invalidate_task(self, task_id: Optional[str] = None):
+        """使任务缓存失效，task_id为空时清空全部缓存"""
+        with self._task_cache_lock:
+            self._task_cache_version += 1
+            if task_id is None:
+                self._task_cache.clear()
+            else:
+                self._task_cache.pop(task_id, None)
+    
+    def clear_task_cache(self):
+        """清空 get_task 缓存"""
+        self._invalidate_task()
+    
+    def get_task(self, task_id: str, use_cache: bool = True) -> Optional[Mapping[str, Any]]:
         """
         获取任务信息
         
         Args:
             task_id: 任务ID
+            use_cache: 是否使用进程内缓存
             
         Returns:
-            任务信息字典
+            任务信息（只读映射；启用缓存时多次调用返回同一实例，需要修改时请先 dict(task)）
         """
+        if use_cache:
+            with self._task_cache_lock:
+                task = self._task_cache.get(task_id)
+                if task is not None:
+                    self._task_cache.move_to_end(task_id)
+                    return task
+                version = self._task_cache_version
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._pool.acquire() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = _TaskRow.from_row
                 
-                cursor.execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,))
-                row = cursor.fetchone()
+                cursor.execute(f'{_TASK_SELECT} WHERE task_id = ?', (task_id,))
+                task = cursor.fetchone()
                 
-                if row:
-                    task = dict(row)
-                    if task['metadata']:
-                        task['metadata'] = json.loads(task['metadata'])
+                if task:
+                    if use_cache:
+                        with self._task_cache_lock:
+                            if version == self._task_cache_version and self._task_cache_size > 0:
+                                self._task_cache[task_id] = task
+                                if len(self._task_cache) > self._task_cache_size:
+                                    self._task_cache.popitem(last=False)
                     return task
                 
                 return None
@@ -286,12 +1179,49 @@ class DatabaseManager(LoggerMixin):
             self.logger.error(f"获取任务失败: {e}")
             return None
     
+    def iter_tasks(
+        self, 
+        status: Optional[str] = None, 
+        limit: int = 100,
+        offset: int = 0
+    ) -> Iterator[Mapping[str, Any]]:
+        """
+        逐行迭代任务（按创建时间倒序），不一次性构建完整列表
+        
+        Args:
+            status: 筛选状态
+            limit: 限制数量  
+            offset: 偏移量
+            
+        Yields:
+            任务信息（只读映射）
+        """
+        with self._pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _TaskRow.from_row
+            
+            if status:
+                cursor.execute(f'''
+                    {_TASK_SELECT} 
+                    WHERE status = ? 
+                    ORDER BY created_at DESC 
+                    LIMIT ? OFFSET ?
+                ''', (status, limit, offset))
+            else:
+                cursor.execute(f'''
+                    {_TASK_SELECT} 
+                    ORDER BY created_at DESC 
+                    LIMIT ? OFFSET ?
+                ''', (limit, offset))
+            
+            yield from cursor
+    
     def list_tasks(
         self, 
         status: Optional[str] = None, 
         limit: int = 100,
         offset: int = 0
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Mapping[str, Any]]:
         """
         列出任务
         
@@ -304,32 +1234,7 @@ class DatabaseManager(LoggerMixin):
             任务列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                if status:
-                    cursor.execute('''
-                        SELECT * FROM tasks 
-                        WHERE status = ? 
-                        ORDER BY created_at DESC 
-                        LIMIT ? OFFSET ?
-                    ''', (status, limit, offset))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM tasks 
-                        ORDER BY created_at DESC 
-                        LIMIT ? OFFSET ?
-                    ''', (limit, offset))
-                
-                tasks = []
-                for row in cursor.fetchall():
-                    task = dict(row)
-                    if task['metadata']:
-                        task['metadata'] = json.loads(task['metadata'])
-                    tasks.append(task)
-                
-                return tasks
+            return list(self.iter_tasks(status, limit, offset))
                 
         except Exception as e:
             self.logger.error(f"列出任务失败: {e}")
@@ -343,24 +1248,32 @@ class DatabaseManager(LoggerMixin):
         word_count: int,
         chapters_found: int,
         processing_time: float
-    ) -> bool:
-        """保存文本解析结果"""
+    ) -> Optional[int]:
+        """
+        保存文本解析结果
+        
+        Returns:
+            新记录ID，失败时返回None
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO text_parsing 
-                    (task_id, original_content, parsed_content, word_count, chapters_found, processing_time)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (task_id, original_content, parsed_content, word_count, chapters_found, processing_time))
-                
-                conn.commit()
-                return True
-                
+            result = self._write('''
+                INSERT INTO text_parsing 
+                (task_id, original_content, parsed_content, word_count, chapters_found, processing_time)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                task_id,
+                self._pack_content(original_content),
+                self._pack_content(parsed_content),
+                word_count,
+                chapters_found,
+                processing_time
+            ))
+            
+            return result.lastrowid
+            
         except Exception as e:
             self.logger.error(f"保存文本解析结果失败: {e}")
-            return False
+            return None
     
     def save_llm_script(
         self,
@@ -371,32 +1284,96 @@ class DatabaseManager(LoggerMixin):
         tokens_used: int,
         cost: float,
         processing_time: float
-    ) -> bool:
-        """保存LLM脚本生成结果"""
+    ) -> Optional[int]:
+        """
+        保存LLM脚本生成结果
+        
+        Returns:
+            新记录ID，失败时返回None
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            result = self._write('''
+                INSERT INTO llm_scripts 
+                (task_id, prompt, response, script_data, tokens_used, cost, processing_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                task_id, 
+                _pack_text(prompt), 
+                _pack_text(response), 
+                _encode_json(script_data),
+                tokens_used,
+                cost,
+                processing_time
+            ))
+            
+            return result.lastrowid
+            
+        except Exception as e:
+            self.logger.error(f"保存LLM脚本结果失败: {e}")
+            return None
+    
+    def get_text_parsing(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务最近一次的文本解析结果
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            解析结果字典（original_content/parsed_content 已还原）
+        """
+        try:
+            with self._pool.acquire() as conn:
+                row = conn.execute(f'''
+                    SELECT {', '.join(_TEXT_PARSING_COLUMNS)} FROM text_parsing 
+                    WHERE task_id = ? 
+                    ORDER BY id DESC 
+                    LIMIT 1
+                ''', (task_id,)).fetchone()
                 
-                cursor.execute('''
-                    INSERT INTO llm_scripts 
-                    (task_id, prompt, response, script_data, tokens_used, cost, processing_time)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    task_id, 
-                    prompt, 
-                    response, 
-                    json.dumps(script_data),
-                    tokens_used,
-                    cost,
-                    processing_time
-                ))
+                if row is None:
+                    return None
                 
-                conn.commit()
-                return True
+                record = dict(zip(_TEXT_PARSING_COLUMNS, row))
+                record['original_content'] = _unpack_text(record['original_content'], self._blobs)
+                record['parsed_content'] = _unpack_text(record['parsed_content'], self._blobs)
+                return record
                 
         except Exception as e:
-            self.logger.error(f"保存LLM脚本结果失败: {e}")
-            return False
+            self.logger.error(f"获取文本解析结果失败: {e}")
+            return None
+    
+    def get_llm_script(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务最近一次的LLM脚本生成结果
+        
+        Args:
+            task_id: 任务ID
+            
+        Returns:
+            脚本记录字典（prompt/response 已解压，script_data 已解析）
+        """
+        try:
+            with self._pool.acquire() as conn:
+                row = conn.execute(f'''
+                    SELECT {', '.join(_LLM_SCRIPT_COLUMNS)} FROM llm_scripts 
+                    WHERE task_id = ? 
+                    ORDER BY id DESC 
+                    LIMIT 1
+                ''', (task_id,)).fetchone()
+                
+                if row is None:
+                    return None
+                
+                record = dict(zip(_LLM_SCRIPT_COLUMNS, row))
+                record['prompt'] = _unpack_text(record['prompt'])
+                record['response'] = _unpack_text(record['response'])
+                record['script_data'] = json.loads(record['script_data'])
+                return record
+                
+        except Exception as e:
+            self.logger.error(f"获取LLM脚本结果失败: {e}")
+            return None
     
     def save_media_generation(
         self,
@@ -408,86 +1385,94 @@ class DatabaseManager(LoggerMixin):
         duration: float,
         cost: float,
         processing_time: float
-    ) -> bool:
-        """保存媒体生成记录"""
+    ) -> Optional[int]:
+        """
+        保存媒体生成记录
+        
+        Returns:
+            新记录ID，失败时返回None
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO media_generation 
-                    (task_id, media_type, description, file_path, file_size, duration, cost, processing_time)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (task_id, media_type, description, file_path, file_size, duration, cost, processing_time))
-                
-                conn.commit()
-                return True
-                
+            result = self._write(_INSERT_MEDIA_SQL, (
+                task_id, media_type, description, file_path,
+                file_size, duration, cost, processing_time
+            ))
+            
+            return result.lastrowid
+            
         except Exception as e:
             self.logger.error(f"保存媒体生成记录失败: {e}")
+            return None
+    
+    def save_media_generation_bulk(self, rows: List[Tuple]) -> bool:
+        """
+        批量保存媒体生成记录（单个事务）
+        
+        Args:
+            rows: 记录元组列表，字段顺序为 (task_id, media_type, description,
+                file_path, file_size, duration, cost, processing_time)
+            
+        Returns:
+            是否成功
+        """
+        if not rows:
+            return True
+        
+        try:
+            self._write(_INSERT_MEDIA_SQL, rows, many=True)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"批量保存媒体生成记录失败: {e}")
             return False
     
     def track_daily_cost(self, service_type: str, cost: float, request_count: int = 1):
         """记录日成本"""
         try:
-            today = datetime.now().strftime('%Y-%m-%d')
+            # 单条UPSERT：已有记录则累加，否则插入
+            self._write('''
+                INSERT INTO cost_tracking (date, service_type, request_count, total_cost)
+                VALUES (date('now', 'localtime'), ?, ?, ?)
+                ON CONFLICT(date, service_type) DO UPDATE SET
+                    request_count = request_count + excluded.request_count,
+                    total_cost = total_cost + excluded.total_cost
+            ''', (service_type, request_count, cost))
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 尝试更新现有记录
-                cursor.execute('''
-                    UPDATE cost_tracking 
-                    SET request_count = request_count + ?, 
-                        total_cost = total_cost + ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE date = ? AND service_type = ?
-                ''', (request_count, cost, today, service_type))
-                
-                # 如果没有现有记录，插入新记录
-                if cursor.rowcount == 0:
-                    cursor.execute('''
-                        INSERT INTO cost_tracking (date, service_type, request_count, total_cost)
-                        VALUES (?, ?, ?, ?)
-                    ''', (today, service_type, request_count, cost))
-                
-                conn.commit()
-                
         except Exception as e:
             self.logger.error(f"记录日成本失败: {e}")
     
     def get_daily_cost_summary(self, date: Optional[str] = None) -> Dict[str, Any]:
         """获取日成本汇总"""
         try:
-            if not date:
-                date = datetime.now().strftime('%Y-%m-%d')
-            
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._pool.acquire() as conn:
                 cursor = conn.cursor()
                 
+                # 未指定日期时由SQLite计算当天日期；LEFT JOIN保证至少返回一行以带回日期
                 cursor.execute('''
-                    SELECT service_type, request_count, total_cost
-                    FROM cost_tracking 
-                    WHERE date = ?
-                ''', (date,))
+                    WITH target(day) AS (SELECT COALESCE(?, date('now', 'localtime')))
+                    SELECT target.day, service_type, request_count, total_cost
+                    FROM target
+                    LEFT JOIN cost_tracking ON cost_tracking.date = target.day
+                ''', (date or None,))
                 
                 rows = cursor.fetchall()
                 summary = {
-                    'date': date,
+                    'date': rows[0][0],
                     'services': {},
                     'total_cost': 0.0,
                     'total_requests': 0
                 }
                 
-                for row in rows:
-                    service = row['service_type']
-                    summary['services'][service] = {
-                        'requests': row['request_count'],
-                        'cost': row['total_cost']
+                services = summary['services']
+                for _, service, request_count, total_cost in rows:
+                    if service is None:
+                        continue
+                    services[service] = {
+                        'requests': request_count,
+                        'cost': total_cost
                     }
-                    summary['total_cost'] += row['total_cost']
-                    summary['total_requests'] += row['request_count']
+                    summary['total_cost'] += total_cost
+                    summary['total_requests'] += request_count
                 
                 return summary
                 
@@ -498,39 +1483,34 @@ class DatabaseManager(LoggerMixin):
     def get_task_statistics(self) -> Dict[str, Any]:
         """获取任务统计"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.acquire() as conn:
                 cursor = conn.cursor()
                 
-                # 各状态任务数量
+                # 单次扫描按状态聚合：任务数、今日任务数、平均处理时长
                 cursor.execute('''
-                    SELECT status, COUNT(*) as count 
+                    SELECT 
+                        status,
+                        COUNT(*),
+                        SUM(date(created_at) = date('now')),
+                        AVG(
+                            CASE 
+                                WHEN completed_at IS NOT NULL AND started_at IS NOT NULL 
+                                THEN (julianday(completed_at) - julianday(started_at)) * 86400
+                                ELSE NULL 
+                            END
+                        )
                     FROM tasks 
                     GROUP BY status
                 ''')
-                status_counts = dict(cursor.fetchall())
                 
-                # 今日任务数量
-                cursor.execute('''
-                    SELECT COUNT(*) 
-                    FROM tasks 
-                    WHERE date(created_at) = date('now')
-                ''')
-                today_tasks = cursor.fetchone()[0]
-                
-                # 总处理时长
-                cursor.execute('''
-                    SELECT AVG(
-                        CASE 
-                            WHEN completed_at IS NOT NULL AND started_at IS NOT NULL 
-                            THEN (julianday(completed_at) - julianday(started_at)) * 86400
-                            ELSE NULL 
-                        END
-                    ) as avg_processing_time
-                    FROM tasks
-                    WHERE status = 'completed'
-                ''')
-                result = cursor.fetchone()
-                avg_processing_time = result[0] if result[0] else 0
+                status_counts = {}
+                today_tasks = 0
+                avg_processing_time = 0
+                for status, count, today_count, avg_time in cursor.fetchall():
+                    status_counts[status] = count
+                    today_tasks += today_count
+                    if status == 'completed' and avg_time:
+                        avg_processing_time = avg_time
                 
                 return {
                     'status_counts': status_counts,
@@ -543,43 +1523,29 @@ class DatabaseManager(LoggerMixin):
             return {'status_counts': {}, 'today_tasks': 0, 'avg_processing_time': 0}
     
     def cleanup_old_records(self, days: int = 30):
-        """清理旧记录"""
+        """
+        清理旧记录
+        
+        Args:
+            days: 保留天数，早于该天数的已完成/失败任务会被删除
+        """
+        # 天数以参数绑定，SQL文本保持不变以复用预编译语句
+        if isinstance(days, bool) or not isinstance(days, int) or days < 0:
+            raise ValueError(f"保留天数必须是非负整数: {days!r}")
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 清理N天前的已完成任务
-                cursor.execute('''
-                    DELETE FROM tasks 
-                    WHERE status IN ('completed', 'failed') 
-                    AND created_at < datetime('now', '-{} days')
-                '''.format(days))
-                
-                deleted_tasks = cursor.rowcount
-                
-                # 清理孤立的相关记录
-                cursor.execute('''
-                    DELETE FROM text_parsing 
-                    WHERE task_id NOT IN (SELECT task_id FROM tasks)
-                ''')
-                
-                cursor.execute('''
-                    DELETE FROM llm_scripts 
-                    WHERE task_id NOT IN (SELECT task_id FROM tasks)
-                ''')
-                
-                cursor.execute('''
-                    DELETE FROM media_generation 
-                    WHERE task_id NOT IN (SELECT task_id FROM tasks)
-                ''')
-                
-                cursor.execute('''
-                    DELETE FROM final_videos 
-                    WHERE task_id NOT IN (SELECT task_id FROM tasks)
-                ''')
-                
-                conn.commit()
-                self.logger.info(f"清理了 {deleted_tasks} 个旧任务记录")
+            # 清理N天前的已完成任务，相关子表记录由外键级联删除
+            deleted_tasks = self._write(_CLEANUP_TASKS_SQL, (f'-{days} days',)).rowcount
+            self._invalidate_task()
+            
+            self.logger.info(f"清理了 {deleted_tasks} 个旧任务记录")
+            
+            # 清理随记录删除而不再被引用的外部文本
+            with self._pool.acquire() as conn:
+                referenced = {row[0].decode('ascii') for row in conn.execute(_BLOB_REFERENCES_SQL)}
+            deleted_blobs = self._blobs.sweep(referenced)
+            if deleted_blobs:
+                self.logger.info(f"清理了 {deleted_blobs} 个未引用的外部文本文件")
                 
         except Exception as e:
             self.logger.error(f"清理旧记录失败: {e}")
@@ -6,15 +6,28 @@
 提供友好的错误信息、异常处理和恢复机制
 """
 
+import re
 import sys
+import time
 import traceback
+from collections import Counter
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple, Union
-from dataclasses import dataclass
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from dataclasses import dataclass, field, replace
 import json
 
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
 from .logger import LoggerMixin
 
+# dataclass(slots=True) 需要 Python 3.10+；更早的版本退回普通实例字典
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 
 class ErrorLevel(Enum):
     """错误级别"""
@@ -35,234 +48,301 @@ class ErrorCategory(Enum):
     USER = "用户错误"
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ErrorInfo:
-    """错误信息"""
+    """错误信息（不可变，修改请使用 dataclasses.replace）"""
     level: ErrorLevel
     category: ErrorCategory
     code: str
     message: str
     details: str = ""
-    suggestions: List[str] = None
-    technical_info: str = ""
+    suggestions: Tuple[str, ...] = ()
+    exception: Optional[BaseException] = field(default=None, repr=False, compare=False)
     timestamp: float = 0.0
+    # technical_info 的缓存，首次访问时填充
+    _technical_info: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
-        if self.suggestions is None:
-            self.suggestions = []
-        
         if self.timestamp == 0.0:
-            import time
-            self.timestamp = time.time()
+            object.__setattr__(self, 'timestamp', time.time())
+    
+    @property
+    def technical_info(self) -> str:
+        """技术信息（异常堆栈），首次访问时才格式化"""
+        if self._technical_info is None:
+            if self.exception is None:
+                text = ""
+            else:
+                text = "".join(traceback.format_exception(
+                    type(self.exception), self.exception, self.exception.__traceback__
+                ))
+            object.__setattr__(self, '_technical_info', text)
+        return self._technical_info
+
+
+# 错误信息模板注册表（只读，进程内共享；处理异常时复制后再填充详情）
+_ERROR_REGISTRY: Mapping[str, ErrorInfo] = MappingProxyType({
+    # 文件错误
+    "FILE_NOT_FOUND": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.FILE,
+        code="FILE_NOT_FOUND",
+        message="找不到指定的文件",
+        suggestions=(
+            "请检查文件路径是否正确",
+            "确认文件是否存在",
+            "检查文件权限设置"
+        )
+    ),
+    
+    "FILE_READ_ERROR": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.FILE,
+        code="FILE_READ_ERROR", 
+        message="文件读取失败",
+        suggestions=(
+            "检查文件权限",
+            "确认文件未被其他程序占用",
+            "检查磁盘空间是否充足"
+        )
+    ),
+    
+    "FILE_ENCODING_ERROR": ErrorInfo(
+        level=ErrorLevel.WARNING,
+        category=ErrorCategory.FILE,
+        code="FILE_ENCODING_ERROR",
+        message="文件编码识别失败",
+        suggestions=(
+            "尝试使用UTF-8编码保存文件",
+            "确认文件不包含特殊字符",
+            "可以尝试转换文件编码格式"
+        )
+    ),
+    
+    # API错误
+    "API_KEY_INVALID": ErrorInfo(
+        level=ErrorLevel.CRITICAL,
+        category=ErrorCategory.API,
+        code="API_KEY_INVALID",
+        message="API密钥无效或已过期",
+        suggestions=(
+            "检查config.yaml中的API密钥配置",
+            "确认密钥没有过期",
+            "重新生成API密钥",
+            "查看火山引擎控制台确认服务状态"
+        )
+    ),
+    
+    "API_QUOTA_EXCEEDED": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.API,
+        code="API_QUOTA_EXCEEDED",
+        message="API调用配额已用完",
+        suggestions=(
+            "等待配额重置（通常每日重置）",
+            "升级API服务套餐",
+            "优化调用频率",
+            "检查费用余额是否充足"
+        )
+    ),
+    
+    "API_RATE_LIMIT": ErrorInfo(
+        level=ErrorLevel.WARNING,
+        category=ErrorCategory.API,
+        code="API_RATE_LIMIT",
+        message="API调用频率过高",
+        suggestions=(
+            "程序会自动重试，请稍等",
+            "可以在配置中调整调用频率",
+            "如频繁出现，联系服务提供商提升限制"
+        )
+    ),
+    
+    # 网络错误
+    "NETWORK_TIMEOUT": ErrorInfo(
+        level=ErrorLevel.WARNING,
+        category=ErrorCategory.NETWORK,
+        code="NETWORK_TIMEOUT",
+        message="网络连接超时",
+        suggestions=(
+            "检查网络连接状态",
+            "尝试稍后重试",
+            "可以增加超时时间设置",
+            "检查防火墙设置"
+        )
+    ),
+    
+    "NETWORK_CONNECTION_ERROR": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.NETWORK,
+        code="NETWORK_CONNECTION_ERROR",
+        message="无法连接到服务器",
+        suggestions=(
+            "检查网络连接",
+            "确认服务器地址正确",
+            "检查代理设置",
+            "稍后重试"
+        )
+    ),
+    
+    # 配置错误
+    "CONFIG_MISSING": ErrorInfo(
+        level=ErrorLevel.CRITICAL,
+        category=ErrorCategory.CONFIG,
+        code="CONFIG_MISSING",
+        message="缺少必要的配置文件",
+        suggestions=(
+            "复制config.yaml.example为config.yaml",
+            "填写API密钥等必要配置",
+            "参考README文档进行配置"
+        )
+    ),
+    
+    "CONFIG_INVALID": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.CONFIG,
+        code="CONFIG_INVALID",
+        message="配置文件格式错误",
+        suggestions=(
+            "检查YAML语法是否正确",
+            "确认缩进格式",
+            "参考配置文件示例",
+            "使用在线YAML验证工具检查"
+        )
+    ),
+    
+    # 数据错误
+    "DATA_FORMAT_ERROR": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.DATA,
+        code="DATA_FORMAT_ERROR",
+        message="数据格式不正确",
+        suggestions=(
+            "检查输入数据格式",
+            "确认数据完整性",
+            "参考格式要求",
+            "尝试重新生成数据"
+        )
+    ),
+    
+    "DATA_EMPTY": ErrorInfo(
+        level=ErrorLevel.WARNING,
+        category=ErrorCategory.DATA,
+        code="DATA_EMPTY",
+        message="输入数据为空",
+        suggestions=(
+            "检查输入文件是否包含内容",
+            "确认文件不是空文件",
+            "检查数据生成过程"
+        )
+    ),
+    
+    # 系统错误
+    "MEMORY_ERROR": ErrorInfo(
+        level=ErrorLevel.CRITICAL,
+        category=ErrorCategory.SYSTEM,
+        code="MEMORY_ERROR",
+        message="内存不足",
+        suggestions=(
+            "关闭其他不必要的程序",
+            "减少处理文件大小",
+            "增加虚拟内存设置",
+            "升级系统内存"
+        )
+    ),
+    
+    "DISK_SPACE_ERROR": ErrorInfo(
+        level=ErrorLevel.ERROR,
+        category=ErrorCategory.SYSTEM,
+        code="DISK_SPACE_ERROR",
+        message="磁盘空间不足",
+        suggestions=(
+            "清理临时文件",
+            "删除不需要的文件",
+            "更换到其他磁盘",
+            "增加存储空间"
+        )
+    ),
+    
+    # 依赖错误
+    "DEPENDENCY_MISSING": ErrorInfo(
+        level=ErrorLevel.CRITICAL,
+        category=ErrorCategory.SYSTEM,
+        code="DEPENDENCY_MISSING",
+        message="缺少必要的依赖程序",
+        suggestions=(
+            "安装FFmpeg并添加到系统PATH",
+            "运行pip install -r requirements.txt",
+            "检查系统依赖是否完整",
+            "参考安装文档"
+        )
+    ),
+})
+
+# 未注册错误代码使用的通用模板
+_UNKNOWN_ERROR = ErrorInfo(
+    level=ErrorLevel.ERROR,
+    category=ErrorCategory.SYSTEM,
+    code="UNKNOWN_ERROR",
+    message="未知错误",
+    suggestions=("请联系技术支持", "提供错误详情以便排查")
+)
+
+
+# 错误报告中每条错误输出的字段
+_REPORT_FIELDS = ("code", "message", "level", "category", "suggestions", "timestamp")
+_get_report_fields = attrgetter(*_REPORT_FIELDS)
+
+
+def _dumps_report(report: Dict[str, Any]) -> bytes:
+    """将错误报告序列化为UTF-8编码的JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(report)
+    return json.dumps(report, ensure_ascii=False).encode('utf-8')
+
+
+# 按消息关键字分类的规则，按优先级排列；每条规则的所有关键字模式都需出现
+_MESSAGE_RULES = (
+    ("NETWORK_TIMEOUT", ("timeout",)),
+    ("NETWORK_CONNECTION_ERROR", ("connection|network",)),
+    ("API_KEY_INVALID", ("api key|unauthorized",)),
+    ("API_QUOTA_EXCEEDED", ("quota|limit exceeded",)),
+    ("API_RATE_LIMIT", ("rate limit|too many requests",)),
+    ("MEMORY_ERROR", ("memory",)),
+    ("DISK_SPACE_ERROR", ("no space|disk full",)),
+    ("CONFIG_MISSING", ("config", "not found")),
+    ("CONFIG_INVALID", ("config",)),
+    ("DATA_FORMAT_ERROR", ("json|format",)),
+    ("DATA_EMPTY", ("empty",)),
+    ("DEPENDENCY_MISSING", ("ffmpeg|command not found",)),
+)
 
 
 class FriendlyErrorHandler(LoggerMixin):
     """友好错误处理器"""
     
+    # 异常类型到错误代码的映射
+    _TYPE_MAP = {
+        FileNotFoundError: "FILE_NOT_FOUND",
+        PermissionError: "FILE_READ_ERROR",
+        UnicodeDecodeError: "FILE_ENCODING_ERROR",
+        MemoryError: "MEMORY_ERROR",
+    }
+    
+    # 每条规则是从开头匹配的前瞻断言加一个空命名组，按顺序尝试，
+    # 命中的组名即错误代码（与规则在消息中出现的位置无关）
+    _MESSAGE_RE = re.compile(
+        "|".join(
+            "".join(f"(?=.*?(?:{pattern}))" for pattern in patterns) + f"(?P<{code}>)"
+            for code, patterns in _MESSAGE_RULES
+        ),
+        re.IGNORECASE | re.DOTALL
+    )
+    
     def __init__(self):
-        self.error_registry = self._build_error_registry()
+        self.error_registry = _ERROR_REGISTRY
         self.recovery_handlers = {}
         
-    def _build_error_registry(self) -> Dict[str, ErrorInfo]:
-        """构建错误信息注册表"""
-        return {
-            # 文件错误
-            "FILE_NOT_FOUND": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.FILE,
-                code="FILE_NOT_FOUND",
-                message="找不到指定的文件",
-                suggestions=[
-                    "请检查文件路径是否正确",
-                    "确认文件是否存在",
-                    "检查文件权限设置"
-                ]
-            ),
-            
-            "FILE_READ_ERROR": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.FILE,
-                code="FILE_READ_ERROR", 
-                message="文件读取失败",
-                suggestions=[
-                    "检查文件权限",
-                    "确认文件未被其他程序占用",
-                    "检查磁盘空间是否充足"
-                ]
-            ),
-            
-            "FILE_ENCODING_ERROR": ErrorInfo(
-                level=ErrorLevel.WARNING,
-                category=ErrorCategory.FILE,
-                code="FILE_ENCODING_ERROR",
-                message="文件编码识别失败",
-                suggestions=[
-                    "尝试使用UTF-8编码保存文件",
-                    "确认文件不包含特殊字符",
-                    "可以尝试转换文件编码格式"
-                ]
-            ),
-            
-            # API错误
-            "API_KEY_INVALID": ErrorInfo(
-                level=ErrorLevel.CRITICAL,
-                category=ErrorCategory.API,
-                code="API_KEY_INVALID",
-                message="API密钥无效或已过期",
-                suggestions=[
-                    "检查config.yaml中的API密钥配置",
-                    "确认密钥没有过期",
-                    "重新生成API密钥",
-                    "查看火山引擎控制台确认服务状态"
-                ]
-            ),
-            
-            "API_QUOTA_EXCEEDED": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.API,
-                code="API_QUOTA_EXCEEDED",
-                message="API调用配额已用完",
-                suggestions=[
-                    "等待配额重置（通常每日重置）",
-                    "升级API服务套餐",
-                    "优化调用频率",
-                    "检查费用余额是否充足"
-                ]
-            ),
-            
-            "API_RATE_LIMIT": ErrorInfo(
-                level=ErrorLevel.WARNING,
-                category=ErrorCategory.API,
-                code="API_RATE_LIMIT",
-                message="API调用频率过高",
-                suggestions=[
-                    "程序会自动重试，请稍等",
-                    "可以在配置中调整调用频率",
-                    "如频繁出现，联系服务提供商提升限制"
-                ]
-            ),
-            
-            # 网络错误
-            "NETWORK_TIMEOUT": ErrorInfo(
-                level=ErrorLevel.WARNING,
-                category=ErrorCategory.NETWORK,
-                code="NETWORK_TIMEOUT",
-                message="网络连接超时",
-                suggestions=[
-                    "检查网络连接状态",
-                    "尝试稍后重试",
-                    "可以增加超时时间设置",
-                    "检查防火墙设置"
-                ]
-            ),
-            
-            "NETWORK_CONNECTION_ERROR": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.NETWORK,
-                code="NETWORK_CONNECTION_ERROR",
-                message="无法连接到服务器",
-                suggestions=[
-                    "检查网络连接",
-                    "确认服务器地址正确",
-                    "检查代理设置",
-                    "稍后重试"
-                ]
-            ),
-            
-            # 配置错误
-            "CONFIG_MISSING": ErrorInfo(
-                level=ErrorLevel.CRITICAL,
-                category=ErrorCategory.CONFIG,
-                code="CONFIG_MISSING",
-                message="缺少必要的配置文件",
-                suggestions=[
-                    "复制config.yaml.example为config.yaml",
-                    "填写API密钥等必要配置",
-                    "参考README文档进行配置"
-                ]
-            ),
-            
-            "CONFIG_INVALID": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.CONFIG,
-                code="CONFIG_INVALID",
-                message="配置文件格式错误",
-                suggestions=[
-                    "检查YAML语法是否正确",
-                    "确认缩进格式",
-                    "参考配置文件示例",
-                    "使用在线YAML验证工具检查"
-                ]
-            ),
-            
-            # 数据错误
-            "DATA_FORMAT_ERROR": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.DATA,
-                code="DATA_FORMAT_ERROR",
-                message="数据格式不正确",
-                suggestions=[
-                    "检查输入数据格式",
-                    "确认数据完整性",
-                    "参考格式要求",
-                    "尝试重新生成数据"
-                ]
-            ),
-            
-            "DATA_EMPTY": ErrorInfo(
-                level=ErrorLevel.WARNING,
-                category=ErrorCategory.DATA,
-                code="DATA_EMPTY",
-                message="输入数据为空",
-                suggestions=[
-                    "检查输入文件是否包含内容",
-                    "确认文件不是空文件",
-                    "检查数据生成过程"
-                ]
-            ),
-            
-            # 系统错误
-            "MEMORY_ERROR": ErrorInfo(
-                level=ErrorLevel.CRITICAL,
-                category=ErrorCategory.SYSTEM,
-                code="MEMORY_ERROR",
-                message="内存不足",
-                suggestions=[
-                    "关闭其他不必要的程序",
-                    "减少处理文件大小",
-                    "增加虚拟内存设置",
-                    "升级系统内存"
-                ]
-            ),
-            
-            "DISK_SPACE_ERROR": ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.SYSTEM,
-                code="DISK_SPACE_ERROR",
-                message="磁盘空间不足",
-                suggestions=[
-                    "清理临时文件",
-                    "删除不需要的文件",
-                    "更换到其他磁盘",
-                    "增加存储空间"
-                ]
-            ),
-            
-            # 依赖错误
-            "DEPENDENCY_MISSING": ErrorInfo(
-                level=ErrorLevel.CRITICAL,
-                category=ErrorCategory.SYSTEM,
-                code="DEPENDENCY_MISSING",
-                message="缺少必要的依赖程序",
-                suggestions=[
-                    "安装FFmpeg并添加到系统PATH",
-                    "运行pip install -r requirements.txt",
-                    "检查系统依赖是否完整",
-                    "参考安装文档"
-                ]
-            ),
-        }
-    
     def handle_exception(
         self, 
         exception: Exception, 
@@ -281,26 +361,21 @@ class FriendlyErrorHandler(LoggerMixin):
             错误信息对象
         """
         error_code = self._classify_exception(exception)
-        error_info = self.error_registry.get(error_code)
-        
-        if not error_info:
-            # 创建通用错误信息
-            error_info = ErrorInfo(
-                level=ErrorLevel.ERROR,
-                category=ErrorCategory.SYSTEM,
-                code="UNKNOWN_ERROR",
-                message=f"未知错误: {type(exception).__name__}",
-                suggestions=["请联系技术支持", "提供错误详情以便排查"]
-            )
-        
-        # 填充详细信息
-        error_info.details = str(exception)
-        if context:
-            error_info.details = f"{context}: {error_info.details}"
-        
-        # 添加技术信息（仅在调试模式下）
-        if not user_friendly:
-            error_info.technical_info = traceback.format_exc()
+        template = self.error_registry.get(error_code)
+        
+        if template is None:
+            # 通用错误信息
+            template = replace(_UNKNOWN_ERROR, message=f"未知错误: {type(exception).__name__}")
+        
+        # 复制模板并填充详细信息，不修改共享的注册表条目
+        details = f"{context}: {exception}" if context else str(exception)
+        error_info = replace(
+            template,
+            details=details,
+            # 保留异常用于技术信息（仅在调试模式下），堆栈在实际显示时才格式化
+            exception=None if user_friendly else exception,
+            timestamp=time.time()
+        )
         
         return error_info
     
@@ -314,55 +389,16 @@ class FriendlyErrorHandler(LoggerMixin):
         Returns:
             错误代码
         """
-        exception_type = type(exception).__name__
-        error_message = str(exception).lower()
-        
-        # 文件相关错误
-        if isinstance(exception, FileNotFoundError):
-            return "FILE_NOT_FOUND"
-        elif isinstance(exception, PermissionError):
-            return "FILE_READ_ERROR"
-        elif isinstance(exception, UnicodeDecodeError):
-            return "FILE_ENCODING_ERROR"
+        # 按异常类型精确分类（沿MRO查找，保持isinstance语义）
+        for exception_class in type(exception).__mro__:
+            error_code = self._TYPE_MAP.get(exception_class)
+            if error_code:
+                return error_code
         
-        # 网络相关错误
-        elif "timeout" in error_message:
-            return "NETWORK_TIMEOUT"
-        elif "connection" in error_message or "network" in error_message:
-            return "NETWORK_CONNECTION_ERROR"
-        
-        # API相关错误  
-        elif "api key" in error_message or "unauthorized" in error_message:
-            return "API_KEY_INVALID"
-        elif "quota" in error_message or "limit exceeded" in error_message:
-            return "API_QUOTA_EXCEEDED"
-        elif "rate limit" in error_message or "too many requests" in error_message:
-            return "API_RATE_LIMIT"
-        
-        # 内存错误
-        elif isinstance(exception, MemoryError) or "memory" in error_message:
-            return "MEMORY_ERROR"
-        
-        # 磁盘空间错误
-        elif "no space" in error_message or "disk full" in error_message:
-            return "DISK_SPACE_ERROR"
-        
-        # 配置错误
-        elif "config" in error_message:
-            if "not found" in error_message:
-                return "CONFIG_MISSING"
-            else:
-                return "CONFIG_INVALID"
-        
-        # 数据错误
-        elif "json" in error_message or "format" in error_message:
-            return "DATA_FORMAT_ERROR"
-        elif "empty" in error_message:
-            return "DATA_EMPTY"
-        
-        # 依赖错误
-        elif "ffmpeg" in error_message or "command not found" in error_message:
-            return "DEPENDENCY_MISSING"
+        # 按异常消息分类：一次正则匹配完成全部规则判断
+        match = self._MESSAGE_RE.match(str(exception))
+        if match:
+            return match.lastgroup
         
         return "UNKNOWN_ERROR"
     
@@ -474,30 +510,40 @@ class FriendlyErrorHandler(LoggerMixin):
         if not errors:
             return {"status": "success", "errors": []}
         
-        error_counts = {}
-        for error in errors:
-            category = error.category.value
-            error_counts[category] = error_counts.get(category, 0) + 1
+        error_counts = Counter(error.category.value for error in errors)
+        critical_count = sum(1 for error in errors if error.level is ErrorLevel.CRITICAL)
         
-        critical_errors = [e for e in errors if e.level == ErrorLevel.CRITICAL]
+        report_errors = []
+        for error in errors:
+            code, message, level, category, suggestions, timestamp = _get_report_fields(error)
+            report_errors.append({
+                "code": code,
+                "message": message,
+                "level": level.value,
+                "category": category.value,
+                "suggestions": suggestions,
+                "timestamp": timestamp
+            })
         
         return {
-            "status": "error" if critical_errors else "warning",
+            "status": "error" if critical_count else "warning",
             "total_errors": len(errors),
-            "critical_errors": len(critical_errors),
-            "error_categories": error_counts,
-            "errors": [
-                {
-                    "code": error.code,
-                    "message": error.message,
-                    "level": error.level.value,
-                    "category": error.category.value,
-                    "suggestions": error.suggestions,
-                    "timestamp": error.timestamp
-                }
-                for error in errors
-            ]
+            "critical_errors": critical_count,
+            "error_categories": dict(error_counts),
+            "errors": report_errors
         }
+    
+    def report_bytes(self, errors: List[ErrorInfo]) -> bytes:
+        """
+        创建错误报告并序列化为JSON（用于写日志或HTTP响应）
+        
+        Args:
+            errors: 错误信息列表
+            
+        Returns:
+            UTF-8编码的JSON字节串
+        """
+        return _dumps_report(self.create_error_report(errors))
 
 
 # 全局错误处理器实例
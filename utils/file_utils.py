@@ -7,14 +7,163 @@
 """
 
 import os
+import copy
+import codecs
 import shutil
 import hashlib
+import tempfile
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Callable, Tuple
 import yaml
 import json
 from .logger import LoggerMixin
 
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:  # 未编译libyaml时退回纯Python实现
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+try:
+    import xxhash
+except ImportError:  # 未安装xxhash时快速指纹退回标准库blake2b
+    xxhash = None
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，直接使用普通复制
+    fcntl = None
+
+# Linux ioctl FICLONE：在 Btrfs/XFS 等写时复制文件系统上共享数据块（reflink）
+_FICLONE = 0x40049409
+
+
+# 非加密用途（缓存键、去重）的快速文件指纹算法
+_FAST_HASH = xxhash.xxh3_64 if xxhash is not None else hashlib.blake2b
+
+# 常用哈希算法构造函数，避免每次调用按名称查找
+_HASH_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'fast': _FAST_HASH,
+    'xxh': _FAST_HASH,
+}
+
+# 旧版Python无 hashlib.file_digest 时的分块读取大小
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+# 文本文件的BOM及其对应编码（UTF-32 需排在 UTF-16 之前）
+_TEXT_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# 文件名中的非法字符统一替换为下划线
+_ILLEGAL_FILENAME_CHARS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+# 文件大小单位，相邻单位相差 1024 (2**10) 倍
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+# 指定编码解码失败时依次尝试的编码
+_FALLBACK_ENCODINGS = ('gbk', 'gb2312', 'utf-8-sig', 'latin1')
+
+
+def _decode_text(raw: bytes, encoding: str) -> str:
+    """按指定编码解码，并与文本模式读取一样统一换行符"""
+    text = raw.decode(encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _with_parent_dir(dst: Union[str, Path], operation: Callable[[], Any]) -> Any:
+    """
+    执行写入目标路径的操作，仅在目标目录不存在导致失败时创建目录并重试
+    
+    目录通常已经存在，先直接执行可省去每次写入前的 stat/mkdir 系统调用。
+    
+    Args:
+        dst: 目标文件路径
+        operation: 写入操作
+        
+    Returns:
+        写入操作的返回值
+    """
+    try:
+        return operation()
+    except FileNotFoundError:
+        parent = os.path.dirname(os.path.abspath(dst))
+        if os.path.isdir(parent):
+            raise
+        os.makedirs(parent, exist_ok=True)
+        return operation()
+
+
+def _copy_file_data(src: str, dst: str) -> None:
+    """
+    复制文件内容和元数据（等同 shutil.copy2）
+    
+    优先尝试 reflink 零拷贝克隆；文件系统不支持时使用 shutil.copyfile，
+    后者在 Linux 上通过 sendfile/copy_file_range 在内核中完成复制。
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    
+    # 打开目标文件前先排除同一文件，否则会把源文件截断
+    try:
+        if os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} 与 {dst!r} 是同一文件")
+    except FileNotFoundError:
+        pass  # 目标不存在；源不存在时由后续复制抛出
+    
+    # 克隆到同目录临时文件再原子替换，克隆失败时目标文件保持原样；
+    # 目标为符号链接时需写穿链接，交给 shutil.copyfile 处理
+    if fcntl is not None and not os.path.islink(dst):
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix='.', suffix='.tmp', dir=os.path.dirname(dst) or '.'
+            )
+            with os.fdopen(fd, 'wb') as dst_file, open(src, 'rb') as src_file:
+                fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            shutil.copystat(src, tmp_path)
+            os.replace(tmp_path, dst)
+            return
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _iter_files(directory: str):
+    """
+    递归遍历目录下的普通文件（不跟随符号链接）
+    
+    Args:
+        directory: 目录路径
+        
+    Yields:
+        os.DirEntry 对象，其 stat() 结果由 scandir 缓存
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except OSError:
+        pass  # 忽略无法访问的目录
+
 
 class FileUtils(LoggerMixin):
     """文件处理工具类"""
@@ -31,7 +180,9 @@ class FileUtils(LoggerMixin):
             Path对象
         """
         path = Path(path)
-        path.mkdir(parents=True, exist_ok=True)
+        # 目录已存在时只需一次stat
+        if not os.path.isdir(path):
+            path.mkdir(parents=True, exist_ok=True)
         return path
     
     @staticmethod
@@ -45,7 +196,7 @@ class FileUtils(LoggerMixin):
         Returns:
             是否存在
         """
-        return Path(path).exists()
+        return os.path.exists(path)
     
     @staticmethod
     def read_text_file(file_path: Union[str, Path], encoding: str = 'utf-8') -> str:
@@ -59,20 +210,18 @@ class FileUtils(LoggerMixin):
         Returns:
             文件内容
         """
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # 尝试其他编码
-            encodings = ['gbk', 'gb2312', 'utf-8-sig', 'latin1']
-            for enc in encodings:
-                try:
-                    with open(file_path, 'r', encoding=enc) as f:
-                        content = f.read()
-                        return content
-                except UnicodeDecodeError:
-                    continue
-            raise ValueError(f"无法识别文件编码: {file_path}")
+        # 只读取一次原始字节，后续编码尝试都在内存中完成
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        # 带BOM的文件优先按BOM对应的编码解码，其余依次尝试指定编码和常见中文编码
+        bom_encodings = tuple(enc for bom, enc in _TEXT_BOMS if raw.startswith(bom))[:1]
+        for enc in (*bom_encodings, encoding, *_FALLBACK_ENCODINGS):
+            try:
+                return _decode_text(raw, enc)
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"无法识别文件编码: {file_path}")
     
     @staticmethod
     def write_text_file(
@@ -90,12 +239,11 @@ class FileUtils(LoggerMixin):
             encoding: 文件编码
             ensure_dir: 是否自动创建目录
         """
-        file_path = Path(file_path)
-        
-        if ensure_dir:
-            FileUtils.ensure_dir(file_path.parent)
+        def open_file():
+            return open(file_path, 'w', encoding=encoding)
         
-        with open(file_path, 'w', encoding=encoding) as f:
+        f = _with_parent_dir(file_path, open_file) if ensure_dir else open_file()
+        with f:
             f.write(content)
     
     @staticmethod
@@ -111,7 +259,7 @@ class FileUtils(LoggerMixin):
         """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader)
         except Exception as e:
             raise ValueError(f"加载YAML文件失败 {file_path}: {e}")
     
@@ -124,10 +272,8 @@ class FileUtils(LoggerMixin):
             data: 要保存的数据
             file_path: YAML文件路径
         """
-        FileUtils.ensure_dir(Path(file_path).parent)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+        with _with_parent_dir(file_path, lambda: open(file_path, 'w', encoding='utf-8')) as f:
+            yaml.dump(data, f, Dumper=_YamlDumper, default_flow_style=False, allow_unicode=True)
     
     @staticmethod
     def load_json(file_path: Union[str, Path]) -> Dict[str, Any]:
@@ -157,9 +303,7 @@ class FileUtils(LoggerMixin):
             file_path: JSON文件路径
             indent: 缩进空格数
         """
-        FileUtils.ensure_dir(Path(file_path).parent)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with _with_parent_dir(file_path, lambda: open(file_path, 'w', encoding='utf-8')) as f:
             json.dump(data, f, indent=indent, ensure_ascii=False)
     
     @staticmethod
@@ -169,16 +313,23 @@ class FileUtils(LoggerMixin):
         
         Args:
             file_path: 文件路径
-            algorithm: 哈希算法 (md5, sha1, sha256)
+            algorithm: 哈希算法 (md5, sha1, sha256)；fast/xxh 为非加密快速指纹，
+                安装xxhash时使用xxh3_64，否则使用blake2b，结果不宜跨环境持久化比较
             
         Returns:
             文件哈希值
         """
-        hash_func = hashlib.new(algorithm)
+        digest = _HASH_ALGORITHMS.get(algorithm, algorithm)
         
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_func.update(chunk)
+        with open(file_path, 'rb', buffering=0) as f:
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, digest).hexdigest()
+            
+            # Python 3.11 以下：复用同一块缓冲区读取
+            hash_func = digest() if callable(digest) else hashlib.new(digest)
+            buffer = memoryview(bytearray(_HASH_CHUNK_SIZE))
+            while n := f.readinto(buffer):
+                hash_func.update(buffer[:n])
         
         return hash_func.hexdigest()
     
@@ -193,7 +344,7 @@ class FileUtils(LoggerMixin):
         Returns:
             文件大小
         """
-        return Path(file_path).stat().st_size
+        return os.stat(file_path).st_size
     
     @staticmethod
     def format_file_size(size_bytes: int) -> str:
@@ -206,15 +357,13 @@ class FileUtils(LoggerMixin):
         Returns:
             格式化的大小字符串
         """
-        if size_bytes == 0:
+        if size_bytes <= 0:
             return "0B"
         
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s}{size_names[i]}"
+        # 整数位运算确定单位，避免浮点对数在1024整数次幂附近的误差
+        i = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        s = round(size_bytes / (1 << (i * 10)), 2)
+        return f"{s}{_SIZE_UNITS[i]}"
     
     @staticmethod
     def clean_filename(filename: str) -> str:
@@ -227,15 +376,8 @@ class FileUtils(LoggerMixin):
         Returns:
             清理后的文件名
         """
-        # 移除非法字符
-        illegal_chars = r'<>:"/\|?*'
-        for char in illegal_chars:
-            filename = filename.replace(char, '_')
-        
-        # 移除首尾空格和点
-        filename = filename.strip('. ')
-        
-        return filename
+        # 一次替换所有非法字符，并移除首尾空格和点
+        return filename.translate(_ILLEGAL_FILENAME_CHARS).strip('. ')
     
     @staticmethod
     def move_file(src: Union[str, Path], dst: Union[str, Path]) -> None:
@@ -246,13 +388,8 @@ class FileUtils(LoggerMixin):
             src: 源文件路径
             dst: 目标文件路径
         """
-        src_path = Path(src)
-        dst_path = Path(dst)
-        
-        # 确保目标目录存在
-        FileUtils.ensure_dir(dst_path.parent)
-        
-        shutil.move(str(src_path), str(dst_path))
+        # 目标目录不存在时自动创建
+        _with_parent_dir(dst, lambda: shutil.move(os.fspath(src), os.fspath(dst)))
     
     @staticmethod
     def copy_file(src: Union[str, Path], dst: Union[str, Path]) -> None:
@@ -263,13 +400,8 @@ class FileUtils(LoggerMixin):
             src: 源文件路径
             dst: 目标文件路径
         """
-        src_path = Path(src)
-        dst_path = Path(dst)
-        
-        # 确保目标目录存在
-        FileUtils.ensure_dir(dst_path.parent)
-        
-        shutil.copy2(str(src_path), str(dst_path))
+        # 目标目录不存在时自动创建
+        _with_parent_dir(dst, lambda: _copy_file_data(os.fspath(src), os.fspath(dst)))
     
     @staticmethod
     def delete_file(file_path: Union[str, Path]) -> None:
@@ -279,12 +411,16 @@ class FileUtils(LoggerMixin):
         Args:
             file_path: 文件路径
         """
-        path = Path(file_path)
-        if path.exists():
-            if path.is_file():
-                path.unlink()
-            elif path.is_dir():
-                shutil.rmtree(path)
+        # 先直接删除文件，失败后再判断是否为目录，常见情况只需一次系统调用
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+        except (IsADirectoryError, PermissionError):
+            # Windows/macOS 删除目录时报 PermissionError
+            if not os.path.isdir(file_path):
+                raise
+            shutil.rmtree(file_path)
     
     @staticmethod
     def list_files(
@@ -327,38 +463,55 @@ class FileUtils(LoggerMixin):
         """
         import time
         
-        temp_path = Path(temp_dir)
-        if not temp_path.exists():
+        temp_dir = os.fspath(temp_dir)
+        if not os.path.isdir(temp_dir):
             return 0
         
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
+        # 早于该时间点修改的文件需要清理
+        cutoff = time.time() - max_age_hours * 3600
         cleaned_count = 0
         
-        for file_path in temp_path.rglob('*'):
-            if file_path.is_file():
-                file_age = current_time - file_path.stat().st_mtime
-                if file_age > max_age_seconds:
-                    try:
-                        file_path.unlink()
-                        cleaned_count += 1
-                    except Exception:
-                        pass  # 忽略删除失败的文件
+        for entry in _iter_files(temp_dir):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    cleaned_count += 1
+            except OSError:
+                pass  # 忽略删除失败的文件
         
         return cleaned_count
 
 
+# 已解析的配置文件缓存：绝对路径 -> (修改时间, 文件大小, 配置字典)
+_config_cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     """
     加载配置文件的便捷函数
     
+    文件未修改时复用上次解析结果，返回的是副本，调用方可以自由修改。
+    
     Args:
         config_path: 配置文件路径
         
     Returns:
         配置字典
     """
-    return FileUtils.load_yaml(config_path)
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        # 文件不存在等错误交给 load_yaml 统一报告
+        return FileUtils.load_yaml(config_path)
+    
+    key = os.path.abspath(config_path)
+    cached = _config_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return copy.deepcopy(cached[2])
+    
+    config = FileUtils.load_yaml(config_path)
+    _config_cache[key] = (stat.st_mtime_ns, stat.st_size, config)
+    return copy.deepcopy(config)
 
 
 if __name__ == "__main__":
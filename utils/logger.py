@@ -7,11 +7,39 @@
 """
 
 import os
+import atexit
 import logging
+import queue
 import sys
+import functools
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+
+# 日志格式
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 各日志器的后台文件写入监听器，重新配置同名日志器时需先停止旧的监听器
+_file_listeners: Dict[str, QueueListener] = {}
+
+
+def _stop_file_listener(name: str) -> None:
+    """停止日志器的文件写入监听器（写完队列中剩余的记录）并关闭文件"""
+    listener = _file_listeners.pop(name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+@atexit.register
+def _stop_all_file_listeners() -> None:
+    """进程退出前写完所有排队的日志记录"""
+    for name in list(_file_listeners):
+        _stop_file_listener(name)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -27,15 +55,42 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 预先拼接好的带颜色级别名称
+        self._colored_levelnames = {
+            level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()
+        }
+        # 使用默认格式时直接拼接字符串，跳过 % 格式解析
+        self._use_fast_format = self._fmt == LOG_FORMAT
+    
     def format(self, record):
-        # 添加颜色
-        if record.levelname in self.COLORS:
-            record.levelname = (
-                f"{self.COLORS[record.levelname]}"
-                f"{record.levelname}"
-                f"{self.RESET}"
-            )
-        return super().format(record)
+        if self._use_fast_format:
+            return self._format_default(record)
+        
+        # 仅在本处理器格式化期间替换级别名称，结束后恢复，避免颜色代码写入其他处理器（如日志文件）
+        levelname = record.levelname
+        record.levelname = self._colored_levelnames.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+    
+    def _format_default(self, record):
+        """按 LOG_FORMAT 直接拼接日志行，异常和堆栈信息的处理与 logging.Formatter 一致"""
+        levelname = self._colored_levelnames.get(record.levelname, record.levelname)
+        text = (
+            f"{self.formatTime(record, self.datefmt)} - {record.name} - "
+            f"{levelname} - {record.getMessage()}"
+        )
+        
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            text = f"{text}\n{record.exc_text}"
+        if record.stack_info:
+            text = f"{text}\n{self.formatStack(record.stack_info)}"
+        return text
 
 
 def setup_logger(
@@ -65,17 +120,12 @@ def setup_logger(
     
     # 清除现有的处理器
     logger.handlers.clear()
+    _stop_file_listener(name)
     
     # 日志格式
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    formatter = logging.Formatter(fmt=LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
     
-    colored_formatter = ColoredFormatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    colored_formatter = ColoredFormatter(fmt=LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
     
     # 控制台处理器
     if console_output:
@@ -101,7 +151,13 @@ def setup_logger(
         )
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        
+        # 文件写入（含轮转）放到后台线程，记录日志时只需入队
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(log_queue))
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _file_listeners[name] = listener
     
     return logger
 
@@ -125,6 +181,7 @@ def get_logger(name: str = "auto_movie") -> logging.Logger:
     return logger
 
 
+@functools.lru_cache(maxsize=32)
 def _parse_size(size_str: str) -> int:
     """
     解析大小字符串为字节数
@@ -148,6 +205,12 @@ def _parse_size(size_str: str) -> int:
         return int(size_str)
 
 
+@functools.lru_cache(maxsize=None)
+def _class_logger(cls: type) -> logging.Logger:
+    """按类缓存日志器，同一个类的所有实例共享"""
+    return get_logger(cls.__name__)
+
+
 class LoggerMixin:
     """
     日志混入类，为其他类提供日志功能
@@ -156,9 +219,7 @@ class LoggerMixin:
     @property
     def logger(self) -> logging.Logger:
         """获取当前类的日志器"""
-        if not hasattr(self, '_logger'):
-            self._logger = get_logger(self.__class__.__name__)
-        return self._logger
+        return _class_logger(type(self))
 
 
 # 默认日志器实例
@@ -169,16 +230,23 @@ def log_function_call(func):
     """
     装饰器：记录函数调用
     """
+    # 日志器在装饰时解析一次；调试信息仅在DEBUG级别启用时才格式化
+    logger = get_logger(func.__module__)
+    name = func.__name__
+    
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        logger = get_logger(func.__module__)
-        logger.debug(f"调用函数: {func.__name__}")
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("调用函数: %s", name)
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"函数 {func.__name__} 执行成功")
-            return result
         except Exception as e:
-            logger.error(f"函数 {func.__name__} 执行失败: {e}")
+            logger.error("函数 %s 执行失败: %s", name, e)
             raise
+        if debug_enabled:
+            logger.debug("函数 %s 执行成功", name)
+        return result
     return wrapper
 
 
@@ -8,17 +8,99 @@
 
 import gc
 import os
+import ctypes
 import sys
 import time
 import psutil
+import shutil
 import threading
+import weakref
 import functools
-from typing import Any, Callable, Dict, List, Optional
+import itertools
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from contextlib import contextmanager
 
 from .logger import LoggerMixin
 
 
+# GC自动调优：第0代阈值的调整范围与判断标准
+_GC_MIN_THRESHOLD0 = 700
+_GC_MAX_THRESHOLD0 = 50_000
+_GC_HIGH_YIELD = 0.1   # 每次第0代回收释放对象数占阈值的比例高于此值时降低阈值
+_GC_LOW_YIELD = 0.01   # 低于此值说明回收几乎无收获，提高阈值减少回收次数
+
+# 旧文件清理：待删除条目达到该数量时才使用线程池并行删除；每批提交的删除任务数
+_PARALLEL_DELETE_MIN = 16
+_DELETE_BATCH_SIZE = 1024
+
+# 大内存分配点的报告阈值
+_LARGE_ALLOCATION_BYTES = 10 * 1024 * 1024  # 大于10MB的分配点
+
+
+class _Sysinfo(ctypes.Structure):
+    """Linux struct sysinfo（见 sysinfo(2)）"""
+    _fields_ = [
+        ('uptime', ctypes.c_long),
+        ('loads', ctypes.c_ulong * 3),
+        ('totalram', ctypes.c_ulong),
+        ('freeram', ctypes.c_ulong),
+        ('sharedram', ctypes.c_ulong),
+        ('bufferram', ctypes.c_ulong),
+        ('totalswap', ctypes.c_ulong),
+        ('freeswap', ctypes.c_ulong),
+        ('procs', ctypes.c_ushort),
+        ('pad', ctypes.c_ushort),
+        ('totalhigh', ctypes.c_ulong),
+        ('freehigh', ctypes.c_ulong),
+        ('mem_unit', ctypes.c_uint),
+        ('_f', ctypes.c_char * (20 - 2 * ctypes.sizeof(ctypes.c_long) - ctypes.sizeof(ctypes.c_uint))),
+    ]
+
+
+# sysinfo 仅在内核不提供 MemAvailable（3.14以前）时作为可用内存的粗略替代；
+# malloc_trim 用于把glibc已释放但仍持有的内存页归还给系统
+_SYSINFO = None
+_MALLOC_TRIM = None
+if sys.platform.startswith('linux'):
+    try:
+        _LIBC = ctypes.CDLL('libc.so.6', use_errno=True)
+        _SYSINFO = _LIBC.sysinfo
+        _SYSINFO.argtypes = [ctypes.POINTER(_Sysinfo)]
+        _SYSINFO.restype = ctypes.c_int
+        _MALLOC_TRIM = _LIBC.malloc_trim
+        _MALLOC_TRIM.argtypes = [ctypes.c_size_t]
+        _MALLOC_TRIM.restype = ctypes.c_int
+    except (OSError, AttributeError):  # 非glibc环境（如musl）时退回psutil，且不做trim
+        _SYSINFO = None
+        _MALLOC_TRIM = None
+
+
+def _available_memory_bytes() -> int:
+    """
+    获取系统可用内存
+    
+    Returns:
+        可用内存字节数；Linux下取 /proc/meminfo 的 MemAvailable（含可回收的页缓存），
+        旧内核缺少该项时退回 sysinfo 的 freeram + bufferram，其他平台使用psutil
+    """
+    if _SYSINFO is not None:
+        try:
+            # MemAvailable 位于文件开头几行，找到即停止，无需解析整个文件
+            with open('/proc/meminfo', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'MemAvailable:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        
+        info = _Sysinfo()
+        if _SYSINFO(ctypes.byref(info)) == 0:
+            return (info.freeram + info.bufferram) * info.mem_unit
+    return psutil.virtual_memory().available
+
+
 class MemoryManager(LoggerMixin):
     """内存管理器"""
     
@@ -32,30 +114,83 @@ class MemoryManager(LoggerMixin):
         self.max_memory_bytes = max_memory_mb * 1024 * 1024
         self.process = psutil.Process()
         self._memory_warnings = 0
+        
+        # 物理内存总量不会变化，只读取一次
+        self._total_memory_bytes = psutil.virtual_memory().total
+        
+        # 进程内存信息的短时缓存，避免频繁调用时重复系统调用
+        self._usage_cache_ttl = 0.2
+        self._usage_cache_time = 0.0
+        self._usage_cache: Optional[Dict[str, float]] = None
+        
+        # Linux下优先使用PSS（按比例分摊共享页），其他平台或无权限时退回RSS
+        self._pss_supported = sys.platform.startswith('linux')
+        
+        # GC自动调优线程
+        self._gc_tuner: Optional[threading.Thread] = None
+        self._gc_tuner_stop = threading.Event()
+        self._default_gc_threshold = gc.get_threshold()
     
-    def get_memory_usage(self) -> Dict[str, float]:
-        """获取当前内存使用情况"""
+    def get_memory_usage(self, full: bool = False) -> Dict[str, float]:
+        """
+        获取当前内存使用情况
+        
+        Args:
+            full: 是否同时获取系统可用内存（available_mb，需要额外读取系统内存信息）
+            
+        Returns:
+            内存使用情况字典，进程内存信息最多缓存200ms
+        """
         try:
-            memory_info = self.process.memory_info()
-            memory_percent = self.process.memory_percent()
+            usage = self._usage_cache
+            if usage is None or time.monotonic() - self._usage_cache_time >= self._usage_cache_ttl:
+                usage = self._read_memory_usage()
             
-            return {
-                'rss_mb': memory_info.rss / 1024 / 1024,
-                'vms_mb': memory_info.vms / 1024 / 1024,
-                'percent': memory_percent,
-                'available_mb': psutil.virtual_memory().available / 1024 / 1024
-            }
+            if full:
+                usage = dict(usage, available_mb=_available_memory_bytes() / 1024 / 1024)
+            return usage
         except Exception as e:
             self.logger.warning(f"获取内存使用情况失败: {e}")
-            return {'rss_mb': 0, 'vms_mb': 0, 'percent': 0, 'available_mb': 0}
+            return {'rss_mb': 0, 'pss_mb': 0, 'vms_mb': 0, 'percent': 0, 'available_mb': 0}
+    
+    def _read_memory_info(self):
+        """读取进程内存信息，支持时包含pss字段"""
+        if self._pss_supported:
+            try:
+                memory_info = self.process.memory_full_info()
+                if hasattr(memory_info, 'pss'):
+                    return memory_info
+            except (psutil.AccessDenied, NotImplementedError):
+                pass
+            self._pss_supported = False
+        return self.process.memory_info()
+    
+    def _read_memory_usage(self) -> Dict[str, float]:
+        """读取进程内存信息并刷新缓存"""
+        memory_info = self._read_memory_info()
+        pss = getattr(memory_info, 'pss', memory_info.rss)
+        usage = {
+            'rss_mb': memory_info.rss / 1024 / 1024,
+            'pss_mb': pss / 1024 / 1024,
+            'vms_mb': memory_info.vms / 1024 / 1024,
+            'percent': memory_info.rss / self._total_memory_bytes * 100
+        }
+        self._usage_cache = usage
+        self._usage_cache_time = time.monotonic()
+        return usage
     
     def check_memory_pressure(self) -> bool:
-        """检查内存压力"""
-        memory_info = self.get_memory_usage()
+        """检查内存压力（优先按PSS计算，多进程共享的页面只按比例计入）"""
+        try:
+            memory_info = self._read_memory_info()
+        except Exception as e:
+            self.logger.warning(f"获取内存使用情况失败: {e}")
+            return False
         
-        if memory_info['rss_mb'] * 1024 * 1024 > self.max_memory_bytes:
+        used = getattr(memory_info, 'pss', memory_info.rss)
+        if used > self.max_memory_bytes:
             self._memory_warnings += 1
-            self.logger.warning(f"内存使用超限: {memory_info['rss_mb']:.1f}MB")
+            self.logger.warning(f"内存使用超限: {used / 1024 / 1024:.1f}MB")
             return True
         
         return False
@@ -64,14 +199,18 @@ class MemoryManager(LoggerMixin):
         """强制垃圾回收"""
         before_memory = self.get_memory_usage()['rss_mb']
         
-        # 执行垃圾回收
-        collected = {
-            'gen0': gc.collect(0),
-            'gen1': gc.collect(1), 
-            'gen2': gc.collect(2)
-        }
+        # 一次完整回收即可覆盖所有代，无需逐代重复扫描
+        collected = {'total': gc.collect()}
+        if _MALLOC_TRIM is not None:
+            # Python对象释放后glibc通常仍保留内存页，需显式归还才能降低RSS
+            _MALLOC_TRIM(0)
         
-        after_memory = self.get_memory_usage()['rss_mb']
+        # 回收后必须重新读取，不能使用缓存
+        try:
+            after_memory = self._read_memory_usage()['rss_mb']
+        except Exception as e:
+            self.logger.warning(f"获取内存使用情况失败: {e}")
+            after_memory = before_memory
         freed_mb = before_memory - after_memory
         
         self.logger.debug(f"垃圾回收释放内存: {freed_mb:.1f}MB")
@@ -81,10 +220,82 @@ class MemoryManager(LoggerMixin):
             'freed_mb': freed_mb
         }
     
+    def start_gc_autotune(self, interval: float = 30.0):
+        """
+        启动GC阈值自动调优
+        
+        先将第0代阈值提高到上限，之后由后台线程根据第0代回收的实际收获
+        （gc.get_stats 中的 collections/collected）定期调整：回收几乎释放不了对象时
+        提高阈值以减少无效回收，释放较多时降低阈值以控制内存。
+        
+        Args:
+            interval: 调整间隔(秒)
+        """
+        if self._gc_tuner is not None:
+            return
+        
+        _, threshold1, threshold2 = gc.get_threshold()
+        gc.set_threshold(_GC_MAX_THRESHOLD0, threshold1, threshold2)
+        
+        self._gc_tuner_stop.clear()
+        self._gc_tuner = threading.Thread(
+            target=self._gc_autotune_loop, args=(interval,), name='gc-autotune', daemon=True
+        )
+        self._gc_tuner.start()
+        self.logger.debug(f"GC自动调优已启用，第0代初始阈值: {_GC_MAX_THRESHOLD0}")
+    
+    def stop_gc_autotune(self):
+        """停止GC阈值自动调优并恢复原阈值"""
+        if self._gc_tuner is None:
+            return
+        
+        self._gc_tuner_stop.set()
+        self._gc_tuner.join()
+        self._gc_tuner = None
+        gc.set_threshold(*self._default_gc_threshold)
+    
+    def _gc_autotune_loop(self, interval: float):
+        """按间隔根据第0代回收收获调整阈值"""
+        previous = gc.get_stats()[0]
+        
+        while not self._gc_tuner_stop.wait(interval):
+            current = gc.get_stats()[0]
+            collections = current['collections'] - previous['collections']
+            collected = current['collected'] - previous['collected']
+            previous = current
+            if not collections:
+                continue
+            
+            threshold0, threshold1, threshold2 = gc.get_threshold()
+            yield_ratio = collected / (collections * threshold0)
+            
+            if yield_ratio > _GC_HIGH_YIELD:
+                new_threshold0 = max(_GC_MIN_THRESHOLD0, threshold0 // 2)
+            elif yield_ratio < _GC_LOW_YIELD:
+                new_threshold0 = min(_GC_MAX_THRESHOLD0, threshold0 * 2)
+            else:
+                continue
+            
+            if new_threshold0 != threshold0:
+                gc.set_threshold(new_threshold0, threshold1, threshold2)
+                self.logger.debug(f"GC第0代阈值调整: {threshold0} -> {new_threshold0}")
+    
+    def freeze_baseline(self):
+        """
+        冻结当前存活的对象（配置、客户端、已加载模块等长期对象）
+        
+        冻结的对象移入永久代，之后的垃圾回收不再扫描它们。之后才创建的对象
+        （如首次使用时才创建的各处理器实例）不受影响；预热完成后可再次调用。
+        """
+        gc.collect()
+        gc.freeze()
+        self.logger.debug(f"已冻结 {gc.get_freeze_count()} 个长期存活对象")
+    
     @contextmanager
     def memory_limit_context(self):
         """内存限制上下文管理器"""
         start_memory = self.get_memory_usage()['rss_mb']
+        start_full_collections = gc.get_stats()[2]['collections']
         
         try:
             yield
@@ -94,66 +305,155 @@ class MemoryManager(LoggerMixin):
             
             if memory_delta > 100:  # 增长超过100MB
                 self.logger.warning(f"内存增长: {memory_delta:.1f}MB")
-                self.force_gc()
+                # 期间已发生过完整回收时，再次回收也释放不了更多对象
+                if gc.get_stats()[2]['collections'] == start_full_collections:
+                    self.force_gc()
+    
+    def start_allocation_tracing(self, frames: int = 25):
+        """
+        开启 tracemalloc 内存分配追踪（供 cleanup_large_objects 使用）
+        
+        追踪期间内存分配开销会增加约10-30%，仅在排查内存问题时开启。
+        
+        Args:
+            frames: 每个分配点保留的调用栈帧数
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self.logger.debug("内存分配追踪已开启")
     
     def cleanup_large_objects(self):
-        """清理大对象"""
-        # 获取所有对象
-        all_objects = gc.get_objects()
-        large_objects = []
+        """报告占用内存较大的分配点（需先开启内存分配追踪）"""
+        if not tracemalloc.is_tracing():
+            self.logger.debug("未开启内存分配追踪，跳过大对象检查")
+            return
         
-        for obj in all_objects:
-            try:
-                size = sys.getsizeof(obj)
-                if size > 10 * 1024 * 1024:  # 大于10MB的对象
-                    large_objects.append((type(obj).__name__, size))
-            except (TypeError, AttributeError):
-                continue
+        # 按分配位置聚合由C实现完成，无需遍历所有Python对象；
+        # 统计结果已按大小降序排列，遇到第一个不足阈值的分配点即可停止
+        snapshot = tracemalloc.take_snapshot()
+        large_allocations = list(itertools.takewhile(
+            lambda stat: stat.size > _LARGE_ALLOCATION_BYTES,
+            snapshot.statistics('lineno')
+        ))
         
-        if large_objects:
-            self.logger.warning(f"发现 {len(large_objects)} 个大对象")
-            for obj_type, size in large_objects[:5]:  # 显示前5个
-                self.logger.warning(f"  {obj_type}: {size / 1024 / 1024:.1f}MB")
+        if large_allocations:
+            self.logger.warning(f"发现 {len(large_allocations)} 个大内存分配点")
+            for stat in large_allocations[:5]:  # 显示前5个
+                self.logger.warning(f"  {stat.traceback}: {stat.size / 1024 / 1024:.1f}MB")
+
+
+def _merge_metrics(target: Dict[str, List[int]], metrics: Dict[str, List[int]]):
+    """将一张指标表合并到目标表中"""
+    # 其他线程可能同时新增条目，先复制再遍历
+    for operation, (count, total, min_time, max_time) in list(metrics.items()):
+        metric = target.get(operation)
+        if metric is None:
+            target[operation] = [count, total, min_time, max_time]
+        else:
+            metric[0] += count
+            metric[1] += total
+            metric[2] = min(metric[2], min_time)
+            metric[3] = max(metric[3], max_time)
+
+
+def _retire_thread_metrics(lock, live: Dict[int, Dict[str, List[int]]],
+                           retired: Dict[str, List[int]], key: int):
+    """线程退出时将其指标表并入共享汇总表并注销"""
+    with lock:
+        metrics = live.pop(key, None)
+        if metrics:
+            _merge_metrics(retired, metrics)
+
+
+class _ThreadMetrics:
+    """线程本地的指标表持有者，随线程退出被回收"""
+    
+    __slots__ = ('metrics', '__weakref__')
+    
+    def __init__(self):
+        self.metrics: Dict[str, List[int]] = {}
 
 
 class PerformanceMonitor(LoggerMixin):
     """性能监控器"""
     
     def __init__(self):
-        self.metrics = {}
-        self._lock = threading.Lock()
+        # 每个线程独立记录指标，记录时无需加锁；汇总时再合并
+        self._local = threading.local()
+        self._thread_metrics: Dict[int, Dict[str, List[int]]] = {}
+        # 已退出线程的指标并入此表，避免线程池反复换线程时注册表无限增长
+        self._retired_metrics: Dict[str, List[int]] = {}
+        # 回收回调可能在持锁线程内由GC触发，使用可重入锁避免自锁
+        self._registry_lock = threading.RLock()
+    
+    def _get_thread_metrics(self) -> Dict[str, List[int]]:
+        """获取当前线程的指标表（首次调用时注册）"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ThreadMetrics()
+            key = id(holder)
+            with self._registry_lock:
+                self._thread_metrics[key] = holder.metrics
+            # 线程退出时线程本地数据被释放，持有者随之回收并触发合并；
+            # 回调不引用 self，不会延长监控器的生命周期
+            weakref.finalize(holder, _retire_thread_metrics, self._registry_lock,
+                             self._thread_metrics, self._retired_metrics, key)
+        return holder.metrics
     
     def record_timing(self, operation: str, duration: float):
-        """记录操作耗时"""
-        with self._lock:
-            if operation not in self.metrics:
-                self.metrics[operation] = {
-                    'count': 0,
-                    'total_time': 0.0,
-                    'min_time': float('inf'),
-                    'max_time': 0.0
-                }
-            
-            metric = self.metrics[operation]
-            metric['count'] += 1
-            metric['total_time'] += duration
-            metric['min_time'] = min(metric['min_time'], duration)
-            metric['max_time'] = max(metric['max_time'], duration)
+        """记录操作耗时（秒）"""
+        self.record_timing_ns(operation, int(duration * 1_000_000_000))
+    
+    def record_timing_ns(self, operation: str, duration_ns: int):
+        """记录操作耗时（纳秒整数，热路径上避免浮点运算）"""
+        metrics = self._get_thread_metrics()
+        metric = metrics.get(operation)
+        if metric is None:
+            # [次数, 总耗时, 最短耗时, 最长耗时]，单位纳秒
+            metrics[operation] = [1, duration_ns, duration_ns, duration_ns]
+            return
+        
+        metric[0] += 1
+        metric[1] += duration_ns
+        if duration_ns < metric[2]:
+            metric[2] = duration_ns
+        if duration_ns > metric[3]:
+            metric[3] = duration_ns
+    
+    @property
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """合并所有线程后的原始指标（耗时单位为秒）"""
+        merged: Dict[str, List[int]] = {}
+        with self._registry_lock:
+            _merge_metrics(merged, self._retired_metrics)
+            thread_metrics = list(self._thread_metrics.values())
+        
+        for metrics in thread_metrics:
+            _merge_metrics(merged, metrics)
+        
+        return {
+            operation: {
+                'count': count,
+                'total_time': total * 1e-9,
+                'min_time': min_time * 1e-9,
+                'max_time': max_time * 1e-9
+            }
+            for operation, (count, total, min_time, max_time) in merged.items()
+        }
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """获取性能汇总"""
-        with self._lock:
-            summary = {}
-            for operation, metric in self.metrics.items():
-                if metric['count'] > 0:
-                    summary[operation] = {
-                        'count': metric['count'],
-                        'avg_time': metric['total_time'] / metric['count'],
-                        'min_time': metric['min_time'],
-                        'max_time': metric['max_time'],
-                        'total_time': metric['total_time']
-                    }
-            return summary
+        summary = {}
+        for operation, metric in self.metrics.items():
+            if metric['count'] > 0:
+                summary[operation] = {
+                    'count': metric['count'],
+                    'avg_time': metric['total_time'] / metric['count'],
+                    'min_time': metric['min_time'],
+                    'max_time': metric['max_time'],
+                    'total_time': metric['total_time']
+                }
+        return summary
     
     def print_performance_report(self):
         """打印性能报告"""
@@ -176,15 +476,18 @@ class PerformanceMonitor(LoggerMixin):
 def timing_decorator(monitor: PerformanceMonitor):
     """性能监控装饰器"""
     def decorator(func: Callable) -> Callable:
+        # 操作名与记录方法在装饰时解析一次，每次调用不再查找属性
+        operation = sys.intern(func.__name__)
+        record_timing_ns = monitor.record_timing_ns
+        perf_counter_ns = time.perf_counter_ns
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_ns = perf_counter_ns()
             try:
-                result = func(*args, **kwargs)
-                return result
+                return func(*args, **kwargs)
             finally:
-                duration = time.time() - start_time
-                monitor.record_timing(func.__name__, duration)
+                record_timing_ns(operation, perf_counter_ns() - start_ns)
         
         return wrapper
     return decorator
@@ -200,8 +503,9 @@ class ResourceCleaner(LoggerMixin):
         Args:
             temp_dirs: 临时目录列表
         """
-        self.temp_dirs = temp_dirs or []
-        self.temp_files = []
+        # 使用集合，添加与移除均为O(1)
+        self.temp_dirs = set(temp_dirs or ())
+        self.temp_files = set()
         self._cleanup_on_exit = True
         
         # 注册退出时清理
@@ -210,24 +514,22 @@ class ResourceCleaner(LoggerMixin):
     
     def add_temp_file(self, file_path: str):
         """添加临时文件到清理列表"""
-        if file_path not in self.temp_files:
-            self.temp_files.append(file_path)
+        self.temp_files.add(file_path)
     
     def add_temp_dir(self, dir_path: str):
         """添加临时目录到清理列表"""
-        if dir_path not in self.temp_dirs:
-            self.temp_dirs.append(dir_path)
+        self.temp_dirs.add(dir_path)
     
     def cleanup_temp_files(self) -> int:
         """清理临时文件"""
         cleaned_count = 0
         
-        for file_path in self.temp_files[:]:  # 使用副本遍历
+        for file_path in list(self.temp_files):  # 使用副本遍历
             try:
                 if os.path.exists(file_path):
                     os.unlink(file_path)
                     cleaned_count += 1
-                self.temp_files.remove(file_path)
+                self.temp_files.discard(file_path)
             except Exception as e:
                 self.logger.warning(f"清理临时文件失败 {file_path}: {e}")
         
@@ -238,15 +540,14 @@ class ResourceCleaner(LoggerMixin):
     
     def cleanup_temp_dirs(self) -> int:
         """清理临时目录"""
-        import shutil
         cleaned_count = 0
         
-        for dir_path in self.temp_dirs[:]:  # 使用副本遍历
+        for dir_path in list(self.temp_dirs):  # 使用副本遍历
             try:
                 if os.path.exists(dir_path) and os.path.isdir(dir_path):
                     shutil.rmtree(dir_path)
                     cleaned_count += 1
-                self.temp_dirs.remove(dir_path)
+                self.temp_dirs.discard(dir_path)
             except Exception as e:
                 self.logger.warning(f"清理临时目录失败 {dir_path}: {e}")
         
@@ -260,42 +561,81 @@ class ResourceCleaner(LoggerMixin):
         if not os.path.exists(directory):
             return 0
         
-        cleaned_count = 0
         current_time = time.time()
         max_age_seconds = max_age_hours * 3600
         
+        # 先扫描出待删除条目: (路径, 是否为目录)
+        to_delete: List[Tuple[str, bool]] = []
         try:
-            for filename in os.listdir(directory):
-                file_path = os.path.join(directory, filename)
-                
-                try:
-                    file_stat = os.stat(file_path)
-                    file_age = current_time - file_stat.st_mtime
-                    
-                    if file_age > max_age_seconds:
-                        if os.path.isfile(file_path):
-                            os.unlink(file_path)
-                            cleaned_count += 1
-                        elif os.path.isdir(file_path):
-                            import shutil
-                            shutil.rmtree(file_path)
-                            cleaned_count += 1
-                            
-                except Exception as e:
-                    self.logger.warning(f"清理旧文件失败 {file_path}: {e}")
+            # scandir 的 DirEntry 缓存了类型信息，避免每个条目多次系统调用
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
+                        if file_age > max_age_seconds:
+                            to_delete.append((entry.path, entry.is_dir(follow_symlinks=False)))
+                    except Exception as e:
+                        self.logger.warning(f"清理旧文件失败 {entry.path}: {e}")
         
         except Exception as e:
             self.logger.warning(f"访问目录失败 {directory}: {e}")
         
+        cleaned_count = self._delete_paths(to_delete)
+        
         if cleaned_count > 0:
             self.logger.info(f"清理了 {cleaned_count} 个超过{max_age_hours}小时的旧文件")
         
         return cleaned_count
     
+    @staticmethod
+    def _delete_path(path: str, is_dir: bool):
+        """删除目录（递归）或文件/符号链接（只删除链接本身）"""
+        if is_dir:
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+    
+    def _delete_paths(self, to_delete: List[Tuple[str, bool]]) -> int:
+        """
+        删除一批路径，数量较多时使用线程池并行删除（删除时系统调用会释放GIL）
+        
+        Args:
+            to_delete: (路径, 是否为目录) 列表
+            
+        Returns:
+            成功删除的数量
+        """
+        cleaned_count = 0
+        
+        if len(to_delete) < _PARALLEL_DELETE_MIN:
+            for path, is_dir in to_delete:
+                try:
+                    self._delete_path(path, is_dir)
+                    cleaned_count += 1
+                except Exception as e:
+                    self.logger.warning(f"清理旧文件失败 {path}: {e}")
+            return cleaned_count
+        
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cleanup') as executor:
+            # 分批提交，避免一次创建过多Future
+            for start in range(0, len(to_delete), _DELETE_BATCH_SIZE):
+                futures = {
+                    executor.submit(self._delete_path, path, is_dir): path
+                    for path, is_dir in to_delete[start:start + _DELETE_BATCH_SIZE]
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        cleaned_count += 1
+                    except Exception as e:
+                        self.logger.warning(f"清理旧文件失败 {futures[future]}: {e}")
+        
+        return cleaned_count
+    
     def get_disk_usage(self, path: str = ".") -> Dict[str, float]:
         """获取磁盘使用情况"""
         try:
-            import shutil
             total, used, free = shutil.disk_usage(path)
             
             return {
@@ -337,37 +677,27 @@ class AsyncTaskManager(LoggerMixin):
         """
         self.max_concurrent = max_concurrent
         self.semaphore = None
-        self.active_tasks = set()
-        self._lock = threading.Lock()
-    
-    async def get_semaphore(self):
-        """获取信号量"""
-        if self.semaphore is None:
-            import asyncio
-            self.semaphore = asyncio.Semaphore(self.max_concurrent)
-        return self.semaphore
+        # 仅在所属事件循环内修改，协程之间只在await处切换，无需加锁
+        self.active_count = 0
     
     async def run_with_limit(self, coro):
         """使用并发限制运行协程"""
-        semaphore = await self.get_semaphore()
+        semaphore = self.semaphore
+        if semaphore is None:
+            # 首次调用时在事件循环内创建；单线程事件循环下不存在竞争
+            import asyncio
+            semaphore = self.semaphore = asyncio.Semaphore(self.max_concurrent)
         
         async with semaphore:
-            task_id = id(coro)
-            
-            with self._lock:
-                self.active_tasks.add(task_id)
-            
+            self.active_count += 1
             try:
-                result = await coro
-                return result
+                return await coro
             finally:
-                with self._lock:
-                    self.active_tasks.discard(task_id)
+                self.active_count -= 1
     
     def get_active_task_count(self) -> int:
         """获取活跃任务数量"""
-        with self._lock:
-            return len(self.active_tasks)
+        return self.active_count
 
 
 # 全局性能监控实例
@@ -385,9 +715,18 @@ def optimize_imports():
 def setup_performance_monitoring(config: Dict[str, Any]):
     """设置性能监控"""
     # 根据配置调整性能参数
-    memory_limit = config.get('performance', {}).get('memory_limit_mb', 2048)
+    performance_config = config.get('performance', {})
+    memory_limit = performance_config.get('memory_limit_mb', 2048)
     memory_manager.max_memory_bytes = memory_limit * 1024 * 1024
     
+    # 内存分配追踪（默认关闭，开启后 cleanup_large_objects 才会报告大内存分配点）
+    if performance_config.get('trace_allocations', False):
+        memory_manager.start_allocation_tracing()
+    
+    # GC阈值自动调优（默认关闭）
+    if performance_config.get('gc_autotune', False):
+        memory_manager.start_gc_autotune()
+    
     # 添加临时目录到清理器
     temp_dir = config.get('storage', {}).get('temp_dir')
     if temp_dir:
@@ -395,6 +734,9 @@ def setup_performance_monitoring(config: Dict[str, Any]):
     
     # 启用性能监控
     memory_manager.logger.info(f"性能监控已启用，内存限制: {memory_limit}MB")
+    
+    # 初始化阶段的对象长期存活，冻结后不再参与垃圾回收扫描
+    memory_manager.freeze_baseline()
 
 
 if __name__ == "__main__":
@@ -402,7 +744,7 @@ if __name__ == "__main__":
     print("测试性能监控工具...")
     
     # 测试内存管理
-    memory_usage = memory_manager.get_memory_usage()
+    memory_usage = memory_manager.get_memory_usage(full=True)
     print(f"当前内存使用: {memory_usage}")
     
     # 测试性能监控
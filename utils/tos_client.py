@@ -10,63 +10,153 @@ import os
 import asyncio
 import time
 from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
 from pathlib import Path
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    import tos
+    from tos import TosClientV2
+    from tos.models2 import ObjectTobeDeleted
+    from tos.utils import init_content
+except ImportError:  # 未安装tos时延迟到创建客户端时报错
+    tos = None
 
 from .logger import LoggerMixin
 
+# 单次批量删除的对象数上限（TOS DeleteMultiObjects限制）
+_DELETE_BATCH_SIZE = 1000
 
-class TOSClient(LoggerMixin):
-    """TOS对象存储客户端"""
+# 预签名URL有效期（秒）
+_PRESIGN_EXPIRES = 86400  # 24小时有效期
+
+# 默认上传并发数（网络IO为主，可远高于CPU核数）
+_DEFAULT_MAX_CONCURRENCY = 16
+
+
+@dataclass(frozen=True)
+class TOSSettings:
+    """TOS连接配置（校验后不可变）"""
+    region: str
+    bucket: str
+    access_key_id: str
+    secret_access_key: str = field(repr=False)  # 避免密钥出现在日志中
+    endpoint: Optional[str] = None
+    max_concurrency: int = _DEFAULT_MAX_CONCURRENCY
     
-    def __init__(self, config: Dict[str, Any]):
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'TOSSettings':
         """
-        初始化TOS客户端
+        从完整配置中提取并校验TOS配置
         
         Args:
             config: 配置字典
+            
+        Returns:
+            TOS配置
+            
+        Raises:
+            ValueError: 缺少必填项时抛出
         """
-        self.config = config
-        api_config = config.get('api', {}).get('volcengine', {})
-        tos_config = api_config.get('tos', {})
-        
-        self.region = tos_config.get('region')
-        self.bucket = tos_config.get('bucket') 
-        self.access_key_id = tos_config.get('access_key_id')
-        self.secret_access_key = tos_config.get('secret_access_key')
-        self.endpoint = tos_config.get('endpoint')
+        tos_config = config.get('api', {}).get('volcengine', {}).get('tos', {})
+        settings = cls(
+            region=tos_config.get('region'),
+            bucket=tos_config.get('bucket'),
+            access_key_id=tos_config.get('access_key_id'),
+            secret_access_key=tos_config.get('secret_access_key'),
+            endpoint=tos_config.get('endpoint'),
+            max_concurrency=int(tos_config.get('max_concurrency', _DEFAULT_MAX_CONCURRENCY))
+        )
         
         # 验证配置
-        if not all([self.region, self.bucket, self.access_key_id, self.secret_access_key]):
+        if not (settings.region and settings.bucket
+                and settings.access_key_id and settings.secret_access_key):
             raise ValueError("TOS配置不完整，请检查config.yaml中的tos配置")
+        return settings
+
+
+class TOSClient(LoggerMixin):
+    """TOS对象存储客户端"""
+    
+    def __init__(self, settings: TOSSettings):
+        """
+        初始化TOS客户端
+        
+        Args:
+            settings: 已校验的TOS配置（可由 TOSSettings.from_config 或 TOSClient.from_config 创建，
+                多个客户端可共享同一份配置）
+        """
+        self.settings = settings
+        self.region = settings.region
+        self.bucket = settings.bucket
+        self.access_key_id = settings.access_key_id
+        self.secret_access_key = settings.secret_access_key
+        self.endpoint = settings.endpoint
+        self.max_concurrency = settings.max_concurrency
         
         self._client = None
+        self._presign_get = None
+        self._http_method_get = tos.HttpMethodType.Http_Method_Get if tos is not None else None
+        # TOS专用线程池，避免与进程内其他run_in_executor争用默认执行器
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='tos-upload'
+        )
         self.logger.info(f"TOS客户端初始化完成: bucket={self.bucket}, region={self.region}")
     
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'TOSClient':
+        """
+        从完整配置字典创建TOS客户端
+        
+        Args:
+            config: 配置字典
+            
+        Returns:
+            TOS客户端
+        """
+        return cls(TOSSettings.from_config(config))
+    
     def _get_client(self):
         """获取TOS客户端实例（延迟初始化）"""
         if self._client is None:
-            try:
-                import tos
-                from tos import TosClientV2
-                
-                # 按照TOS SDK的实际参数格式创建客户端
-                endpoint = f"tos-{self.region}.volces.com"
-                self._client = TosClientV2(
-                    ak=self.access_key_id,
-                    sk=self.secret_access_key,
-                    endpoint=endpoint,
-                    region=self.region
-                )
-                
-                self.logger.info(f"TOS客户端创建成功: bucket={self.bucket}, endpoint={endpoint}")
-                
-            except ImportError:
+            if tos is None:
                 self.logger.error("缺少tos依赖，请安装：pip install tos")
-                raise
-                
+                raise ImportError("缺少tos依赖，请安装：pip install tos")
+            
+            # 按照TOS SDK的实际参数格式创建客户端
+            endpoint = f"tos-{self.region}.volces.com"
+            client = TosClientV2(
+                ak=self.access_key_id,
+                sk=self.secret_access_key,
+                endpoint=endpoint,
+                region=self.region
+            )
+            # 预绑定GET方法、bucket和有效期，上传后只需传入对象键；
+            # 先于_client赋值，其他线程看到_client时预签名函数已就绪
+            self._presign_get = partial(
+                client.pre_signed_url,
+                self._http_method_get,
+                bucket=self.bucket,
+                expires=_PRESIGN_EXPIRES
+            )
+            self._client = client
+            
+            self.logger.info(f"TOS客户端创建成功: bucket={self.bucket}, endpoint={endpoint}")
+        
         return self._client
     
+    def close(self):
+        """关闭TOS专用线程池（可重复调用）"""
+        self._executor.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     async def upload_image(self, image_path: str, task_id: str = None) -> str:
         """
         上传图片到TOS并返回公网URL
@@ -84,8 +174,8 @@ class TOSClient(LoggerMixin):
             
             # 生成对象键（路径）
             file_ext = Path(image_path).suffix.lower()
-            timestamp = int(time.time())
-            random_id = str(uuid.uuid4())[:8]
+            timestamp = time.time_ns() // 1_000_000_000
+            random_id = os.urandom(4).hex()
             
             if task_id:
                 object_key = f"images/{task_id}/{timestamp}_{random_id}{file_ext}"
@@ -94,7 +184,7 @@ class TOSClient(LoggerMixin):
             
             # 在线程池中执行同步上传
             loop = asyncio.get_event_loop()
-            url = await loop.run_in_executor(None, self._sync_upload, image_path, object_key)
+            url = await loop.run_in_executor(self._executor, self._sync_upload, image_path, object_key)
             
             self.logger.info(f"图片上传成功: {object_key} -> {url}")
             return url
@@ -107,21 +197,18 @@ class TOSClient(LoggerMixin):
         """同步上传图片"""
         client = self._get_client()
         
-        # 使用put_object_from_file方法（参照官方项目）
-        result = client.put_object_from_file(
-            bucket=self.bucket,
-            key=object_key, 
-            file_path=image_path
-        )
+        # 以文件对象流式上传：SDK按块读取并增量计算CRC64，不会整体读入内存；
+        # 显式传入长度，SDK无需再探测文件大小。包装为可重置的流，失败重试时从头重发
+        with open(image_path, 'rb') as f:
+            client.put_object(
+                bucket=self.bucket,
+                key=object_key,
+                content=init_content(f, can_reset=True, init_offset=0),
+                content_length=os.fstat(f.fileno()).st_size
+            )
         
-        # 生成预签名URL（参照官方项目方式）
-        import tos
-        pre_signed_result = client.pre_signed_url(
-            tos.HttpMethodType.Http_Method_Get,
-            bucket=self.bucket, 
-            key=object_key,
-            expires=86400  # 24小时有效期
-        )
+        # 生成预签名URL（本地签名，不产生网络请求）
+        pre_signed_result = self._presign_get(key=object_key)
         
         return pre_signed_result.signed_url
     
@@ -136,23 +223,36 @@ class TOSClient(LoggerMixin):
         Returns:
             上传结果列表：[{'local_path': str, 'url': str, 'success': bool}]
         """
-        results = []
-        
-        # 并行上传（限制并发数）
-        semaphore = asyncio.Semaphore(3)  # 最多3个并发上传
+        results = [None] * len(image_paths)
         
         async def upload_single(path):
-            async with semaphore:
-                try:
-                    url = await self.upload_image(path, task_id)
-                    return {'local_path': path, 'url': url, 'success': True}
-                except Exception as e:
-                    self.logger.error(f"上传失败 {path}: {e}")
-                    return {'local_path': path, 'url': None, 'success': False, 'error': str(e)}
+            try:
+                url = await self.upload_image(path, task_id)
+                return {'local_path': path, 'url': url, 'success': True}
+            except Exception as e:
+                self.logger.error(f"上传失败 {path}: {e}")
+                return {'local_path': path, 'url': None, 'success': False, 'error': str(e)}
         
-        # 创建上传任务
-        tasks = [upload_single(path) for path in image_paths]
-        results = await asyncio.gather(*tasks)
+        # 滑动窗口并行上传：同一时刻最多存在max_concurrency个任务，
+        # 完成一个再创建下一个，任务对象数量与批次大小无关
+        pending = {}
+        path_iter = enumerate(image_paths)
+        try:
+            while True:
+                for index, path in path_iter:
+                    pending[asyncio.ensure_future(upload_single(path))] = index
+                    if len(pending) >= self.max_concurrency:
+                        break
+                if not pending:
+                    break
+                
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[pending.pop(task)] = task.result()
+        finally:
+            # 外层被取消时一并取消未完成的上传
+            for task in pending:
+                task.cancel()
         
         success_count = sum(1 for r in results if r['success'])
         self.logger.info(f"批量上传完成: {success_count}/{len(image_paths)} 成功")
@@ -171,7 +271,7 @@ class TOSClient(LoggerMixin):
         """
         try:
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._sync_delete, object_key)
+            await loop.run_in_executor(self._executor, self._sync_delete, object_key)
             self.logger.info(f"对象删除成功: {object_key}")
             return True
         except Exception as e:
@@ -196,7 +296,7 @@ class TOSClient(LoggerMixin):
         try:
             prefix = f"images/{task_id}/"
             loop = asyncio.get_event_loop()
-            deleted_count = await loop.run_in_executor(None, self._sync_cleanup, prefix)
+            deleted_count = await loop.run_in_executor(self._executor, self._sync_cleanup, prefix)
             
             self.logger.info(f"任务图片清理完成: {deleted_count} 个文件")
             return deleted_count
@@ -205,27 +305,59 @@ class TOSClient(LoggerMixin):
             return 0
     
     def _sync_cleanup(self, prefix: str) -> int:
-        """同步清理指定前缀的对象"""
+        """同步清理指定前缀的对象（分页列举，每页批量删除）"""
         client = self._get_client()
         
-        # 列出对象
+        deleted_count = 0
+        continuation_token = None
         try:
-            response = client.list_objects_v2(bucket=self.bucket, prefix=prefix)
-            objects = response.contents if hasattr(response, 'contents') else []
-            
-            # 批量删除
-            deleted_count = 0
-            for obj in objects:
-                try:
-                    client.delete_object(bucket=self.bucket, key=obj.key)
-                    deleted_count += 1
-                except Exception as e:
-                    self.logger.warning(f"删除对象失败: {obj.key}, {e}")
+            while True:
+                # 逐页列举，每页最多1000个对象，与批量删除上限一致
+                response = client.list_objects_type2(
+                    bucket=self.bucket,
+                    prefix=prefix,
+                    continuation_token=continuation_token,
+                    max_keys=_DELETE_BATCH_SIZE,
+                    list_only_once=True
+                )
+                keys = [obj.key for obj in response.contents]
+                if keys:
+                    deleted_count += self._delete_batch(client, keys)
+                
+                if not response.is_truncated:
+                    break
+                continuation_token = response.next_continuation_token
             
             return deleted_count
         except Exception as e:
             self.logger.error(f"列出对象失败: {e}")
+            return deleted_count
+    
+    def _delete_batch(self, client, keys: list) -> int:
+        """
+        批量删除一页对象
+        
+        Args:
+            client: TOS客户端
+            keys: 对象键列表（不超过1000个）
+            
+        Returns:
+            成功删除的数量
+        """
+        try:
+            result = client.delete_multi_objects(
+                bucket=self.bucket,
+                objects=[ObjectTobeDeleted(key=key) for key in keys],
+                quiet=True
+            )
+        except Exception as e:
+            self.logger.warning(f"批量删除对象失败: {len(keys)} 个, {e}")
             return 0
+        
+        # quiet模式下只返回失败项
+        for error in result.error:
+            self.logger.warning(f"删除对象失败: {error.key}, {error.code} {error.message}")
+        return len(keys) - len(result.error)
 
 
 if __name__ == "__main__":
@@ -235,7 +367,7 @@ if __name__ == "__main__":
     
     async def test_tos():
         config = load_config("config.yaml")
-        client = TOSClient(config)
+        client = TOSClient.from_config(config)
         
         # 创建测试图片
         test_image = "./test_image.jpg"
@@ -252,6 +384,7 @@ if __name__ == "__main__":
             print(f"清理完成: {deleted} 个文件")
             
         finally:
+            client.close()
             # 清理测试文件
             if os.path.exists(test_image):
                 os.remove(test_image)